@@ -0,0 +1,137 @@
+"""
+Todo write throughput: the single-item endpoints, one request per todo,
+against the `/todos/bulk` endpoints, one request per batch.
+
+    python -m benchmarks.bulk --todos 2000 --batch-size 500
+    python -m benchmarks.bulk --base-url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import (
+    api_client,
+    configure_app,
+    create_database,
+    random_text,
+    sign_up,
+    write_report,
+)
+
+
+def batches(items: list, size: int) -> list[list]:
+    return [
+        items[start : start + size] for start in range(0, len(items), size)
+    ]
+
+
+def throughput(todos: int, seconds: float) -> dict:
+    return {
+        'todos': todos,
+        'seconds': seconds,
+        'todos_per_second': todos / seconds,
+    }
+
+
+async def single(client, headers, todos: list[dict]) -> dict:
+    timings = {}
+
+    start = time.perf_counter()
+    ids = []
+    for todo in todos:
+        response = await client.post('/todos/', headers=headers, json=todo)
+        ids.append(response.json()['id'])
+    timings['create'] = throughput(len(ids), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for todo_id in ids:
+        await client.patch(
+            f'/todos/{todo_id}', headers=headers, json={'state': 'done'}
+        )
+    timings['update'] = throughput(len(ids), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for todo_id in ids:
+        await client.delete(f'/todos/{todo_id}', headers=headers)
+    timings['delete'] = throughput(len(ids), time.perf_counter() - start)
+
+    return timings
+
+
+async def bulk(client, headers, todos: list[dict], batch_size: int) -> dict:
+    timings = {}
+
+    start = time.perf_counter()
+    ids = []
+    for batch in batches(todos, batch_size):
+        response = await client.post(
+            '/todos/bulk', headers=headers, json=batch
+        )
+        ids.extend(result['id'] for result in response.json()['results'])
+    timings['create'] = throughput(len(ids), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for batch in batches(ids, batch_size):
+        await client.patch(
+            '/todos/bulk',
+            headers=headers,
+            json=[{'id': todo_id, 'state': 'done'} for todo_id in batch],
+        )
+    timings['update'] = throughput(len(ids), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for batch in batches(ids, batch_size):
+        await client.request(
+            'DELETE', '/todos/bulk', headers=headers, json=batch
+        )
+    timings['delete'] = throughput(len(ids), time.perf_counter() - start)
+
+    return timings
+
+
+async def main(args):
+    if not args.base_url:
+        configure_app(args.database_url)
+        engine = await create_database(args.database_url)
+        await engine.dispose()
+
+    rng = random.Random(42)
+    todos = [
+        {
+            'title': random_text(rng, 3),
+            'description': random_text(rng, 8),
+            'state': 'todo',
+        }
+        for _ in range(args.todos)
+    ]
+
+    async with api_client(args.base_url) as client:
+        headers = await sign_up(client, f'bulk{rng.getrandbits(32)}')
+        results = {
+            'todos': args.todos,
+            'batch_size': args.batch_size,
+            'single': await single(client, headers, todos),
+            'bulk': await bulk(client, headers, todos, args.batch_size),
+        }
+
+    write_report('bulk', results, args.output)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--database-url',
+        default='sqlite+aiosqlite:///'
+        + str(Path(tempfile.gettempdir()) / 'fastapi_do_zero_bulk.db'),
+    )
+    parser.add_argument(
+        '--base-url', help='benchmark a running server instead'
+    )
+    parser.add_argument('--todos', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--output')
+    asyncio.run(main(parser.parse_args()))
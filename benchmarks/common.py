@@ -0,0 +1,201 @@
+import json
+import os
+import platform
+import random
+import secrets
+import statistics
+import subprocess
+import sys
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from fastapi_do_zero.models import Todo, TodoState, User, table_registry
+
+WORDS = (
+    'buy milk call mom write report review code fix bug deploy app plan '
+    'trip book flight pay rent clean house walk dog read book study python '
+    'water plants cook dinner send email meet team update docs test api '
+    'renew passport order pizza schedule dentist backup photos'
+).split()
+
+
+BATCH_SIZE = 10_000
+TAGS = 10_000
+
+
+def random_text(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choices(WORDS, k=words))
+
+
+def random_tag(rng: random.Random) -> str:
+    """
+    A rare word, shared by roughly one todo in every `TAGS`.
+    """
+    return f'tag{rng.randrange(TAGS)}'
+
+
+async def create_database(url: str) -> AsyncEngine:
+    """
+    Create an engine for `url` and make sure the schema exists.
+    """
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+    return engine
+
+
+async def seed_todos(
+    engine: AsyncEngine,
+    *,
+    users: int,
+    todos_per_user: int,
+    password: str = 'benchmark',
+    seed: int = 42,
+) -> list[int]:
+    """
+    Insert `users` users with `todos_per_user` todos each.
+    Returns the ids of the new users. `password` must already be hashed.
+    """
+    rng = random.Random(seed)
+    states = list(TodoState)
+    # Not taken from `rng`: the same data can be seeded again into the
+    # same database.
+    suffix = random.getrandbits(32)
+
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            insert(User).returning(User.id),
+            [
+                {
+                    'username': f'bench{suffix}_{n}',
+                    'email': f'bench{suffix}_{n}@example.com',
+                    'password': password,
+                }
+                for n in range(users)
+            ],
+        )
+        user_ids = list(result.scalars())
+
+    for user_id in user_ids:
+        for start in range(0, todos_per_user, BATCH_SIZE):
+            rows = [
+                {
+                    'title': random_text(rng, 3),
+                    'description': (
+                        f'{random_text(rng, 8)} {random_tag(rng)}'
+                    ),
+                    'state': rng.choice(states),
+                    'user_id': user_id,
+                }
+                for _ in range(min(BATCH_SIZE, todos_per_user - start))
+            ]
+            async with engine.begin() as conn:
+                await conn.execute(insert(Todo.__table__), rows)
+
+    return user_ids
+
+
+def configure_app(database_url: str):
+    """
+    Point the application at `database_url`. Must run before
+    `fastapi_do_zero.app` is imported, since settings are read at import.
+    """
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('SECRET_KEY', secrets.token_hex(32))
+    os.environ.setdefault('ALGORITHM', 'HS256')
+    os.environ.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+
+
+@asynccontextmanager
+async def api_client(
+    base_url: str | None = None,
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    A client for a running server at `base_url`, or for the application
+    in-process when `base_url` is not given.
+    """
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url, timeout=60)
+    else:
+        from fastapi_do_zero.app import app  # noqa: PLC0415
+
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url='http://benchmark',
+            timeout=60,
+        )
+
+    async with client:
+        yield client
+
+
+async def sign_up(client: httpx.AsyncClient, name: str) -> dict:
+    """
+    Create a user through the API and return its authorization headers.
+    """
+    email = f'{name}@example.com'
+    await client.post(
+        '/users/',
+        json={'username': name, 'email': email, 'password': 'benchmark'},
+    )
+    response = await client.post(
+        '/auth/token', data={'username': email, 'password': 'benchmark'}
+    )
+    response.raise_for_status()
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+
+def summarize(samples: list[float]) -> dict:
+    """
+    Latency summary, in milliseconds, of samples measured in seconds.
+    """
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        index = min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))
+        return ordered[index] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(name: str, results: dict, output: str | None = None):
+    """
+    Print the report as JSON, or write it to `output`, so runs on
+    different commits can be compared.
+    """
+    report = {
+        'benchmark': name,
+        'commit': git_commit(),
+        'created_at': datetime.now(tz=timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'results': results,
+    }
+    content = json.dumps(report, indent=2, default=str)
+
+    if output:
+        Path(output).write_text(content + '\n', encoding='utf-8')
+    else:
+        print(content)
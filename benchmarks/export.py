@@ -0,0 +1,95 @@
+"""
+Todo export memory: streaming `/todos/export` against materializing the
+whole list the way `GET /todos` does, on a large todo table.
+
+    python -m benchmarks.export --rows 1000000
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.common import create_database, seed_todos, write_report
+from fastapi_do_zero.export import export_query, export_todos
+from fastapi_do_zero.models import Todo
+from fastapi_do_zero.schemas import TodoListSchema
+
+
+async def measure(func) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = await func()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'seconds': seconds,
+        'peak_memory_mb': peak / 2**20,
+        'body_mb': size / 2**20,
+    }
+
+
+async def main(args):
+    engine = await create_database(args.database_url)
+
+    async with engine.connect() as conn:
+        user_id = await conn.scalar(select(func.min(Todo.user_id)))
+        existing = 0
+        if user_id is not None:
+            existing = await conn.scalar(
+                select(func.count()).where(Todo.user_id == user_id)
+            )
+
+    if existing < args.rows:
+        [user_id] = await seed_todos(engine, users=1, todos_per_user=args.rows)
+
+    async def stream():
+        session = AsyncSession(engine)
+        size = 0
+        async for chunk in export_todos(
+            session, export_query(user_id), args.format
+        ):
+            size += len(chunk)
+        return size
+
+    async def materialize():
+        async with AsyncSession(engine) as session:
+            todos = await session.scalars(
+                select(Todo).where(Todo.user_id == user_id).order_by(Todo.id)
+            )
+            body = TodoListSchema.model_validate(
+                {'todos': todos.all()}, from_attributes=True
+            ).model_dump_json()
+        return len(body)
+
+    results = {
+        'dialect': engine.dialect.name,
+        'rows': args.rows,
+        'format': args.format,
+        'stream': await measure(stream),
+        'materialize': await measure(materialize),
+    }
+    await engine.dispose()
+
+    write_report('export', results, args.output)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--database-url',
+        default='sqlite+aiosqlite:///'
+        + str(Path(tempfile.gettempdir()) / 'fastapi_do_zero_export.db'),
+    )
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument(
+        '--format', choices=['ndjson', 'csv'], default='ndjson'
+    )
+    parser.add_argument('--output')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,98 @@
+"""
+Todo search latency: ranked full-text search (`?q=`) against the
+`LIKE '%x%'` title/description filters, on a large todo table.
+
+    python -m benchmarks.search --rows 1000000
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from benchmarks.common import (
+    WORDS,
+    create_database,
+    random_tag,
+    seed_todos,
+    summarize,
+    write_report,
+)
+from fastapi_do_zero.models import Todo
+from fastapi_do_zero.search import search_todos
+
+
+async def measure(engine: AsyncEngine, queries: list) -> list[float]:
+    samples = []
+    async with engine.connect() as conn:
+        for query in queries:
+            start = time.perf_counter()
+            await conn.execute(query)
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def main(args):
+    engine = await create_database(args.database_url)
+    dialect = engine.dialect.name
+
+    async with engine.connect() as conn:
+        existing = await conn.scalar(select(func.count()).select_from(Todo))
+
+    if existing < args.rows:
+        await seed_todos(engine, users=1, todos_per_user=args.rows - existing)
+
+    async with engine.connect() as conn:
+        user_id = await conn.scalar(select(func.min(Todo.user_id)))
+
+    rng = random.Random(7)
+    terms = [rng.choice(WORDS) for _ in range(args.queries)]
+    rare_terms = [random_tag(rng) for _ in range(args.queries)]
+    base = select(Todo).where(Todo.user_id == user_id).limit(100)
+
+    def like_queries(terms):
+        return [
+            base.where(
+                or_(Todo.title.contains(term), Todo.description.contains(term))
+            )
+            for term in terms
+        ]
+
+    def search_queries(terms):
+        return [search_todos(base, term, dialect) for term in terms]
+
+    results = {
+        'dialect': dialect,
+        'rows': max(existing, args.rows),
+        'common_terms': {
+            'like': summarize(await measure(engine, like_queries(terms))),
+            'search': summarize(await measure(engine, search_queries(terms))),
+        },
+        'rare_terms': {
+            'like': summarize(await measure(engine, like_queries(rare_terms))),
+            'search': summarize(
+                await measure(engine, search_queries(rare_terms))
+            ),
+        },
+    }
+    await engine.dispose()
+
+    write_report('search', results, args.output)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--database-url',
+        default='sqlite+aiosqlite:///'
+        + str(Path(tempfile.gettempdir()) / 'fastapi_do_zero_search.db'),
+    )
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--output')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,246 @@
+"""
+Cost of the security primitives: Argon2 hashing and verification for a
+grid of cost settings, and JWT encoding and decoding per algorithm.
+Recommends the strongest measured Argon2 settings whose verification
+stays within a target login latency on this machine.
+
+    python -m benchmarks.security
+    python -m benchmarks.security --time-costs 1,2,3,4 \\
+        --memory-costs 19456,47104,65536 --parallelism 1,2,4 --target-ms 250
+
+Timings are sequential, on a single core: ops/sec is per core. The
+hashing pool runs up to PASSWORD_HASH_WORKERS of them at once.
+"""
+
+import argparse
+import itertools
+import os
+import secrets
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.common import configure_app, summarize, write_report
+
+PASSWORD = 'correct horse battery staple'
+
+HMAC_ALGORITHMS = ('HS256', 'HS384', 'HS512')
+ASYMMETRIC_ALGORITHMS = ('RS256', 'ES256', 'EdDSA')
+
+
+def measure(func: Callable, rounds: int) -> dict:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+
+    summary = summarize(samples)
+    summary['ops_per_second'] = 1000 / summary['mean_ms']
+    return summary
+
+
+def integers(value: str) -> list[int]:
+    return [int(item) for item in value.split(',')]
+
+
+def argon2_grid(args) -> list[dict]:
+    from fastapi_do_zero.security import password_context  # noqa: PLC0415
+
+    results = []
+    for time_cost, memory_cost, parallelism in itertools.product(
+        args.time_costs, args.memory_costs, args.parallelism
+    ):
+        context = password_context(time_cost, memory_cost, parallelism)
+        hashed = context.hash(PASSWORD)
+        results.append({
+            'time_cost': time_cost,
+            'memory_cost': memory_cost,
+            'parallelism': parallelism,
+            'hash': measure(lambda: context.hash(PASSWORD), args.rounds),
+            'verify': measure(
+                lambda: context.verify(PASSWORD, hashed), args.rounds
+            ),
+        })
+    return results
+
+
+def recommend(results: list[dict], target_ms: float) -> dict:
+    """
+    The measured settings with the most memory, then the most passes,
+    whose p95 verification is within `target_ms`.
+    """
+    within = [
+        result for result in results if result['verify']['p95_ms'] <= target_ms
+    ]
+    if not within:
+        cheapest = min(results, key=lambda result: result['verify']['p95_ms'])
+        return {
+            'target_ms': target_ms,
+            'settings': None,
+            'note': (
+                'No measured settings meet the target; the cheapest '
+                f'verifies in {cheapest["verify"]["p95_ms"]:.1f} ms (p95).'
+            ),
+        }
+
+    best = max(
+        within,
+        key=lambda result: (
+            result['memory_cost'],
+            result['time_cost'],
+            -result['parallelism'],
+        ),
+    )
+    return {
+        'target_ms': target_ms,
+        'settings': {
+            'ARGON2_TIME_COST': best['time_cost'],
+            'ARGON2_MEMORY_COST': best['memory_cost'],
+            'ARGON2_PARALLELISM': best['parallelism'],
+        },
+        'verify_p95_ms': best['verify']['p95_ms'],
+    }
+
+
+def signing_keys(algorithm: str) -> tuple | None:
+    """
+    `(signing key, verifying key)`, None when `cryptography` is missing.
+    """
+    if algorithm in HMAC_ALGORITHMS:
+        secret = secrets.token_hex(32)
+        return secret, secret
+
+    try:
+        from cryptography.hazmat.primitives.asymmetric import (  # noqa: PLC0415
+            ec,
+            ed25519,
+            rsa,
+        )
+    except ImportError:
+        return None
+
+    if algorithm == 'RS256':
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == 'ES256':
+        key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        key = ed25519.Ed25519PrivateKey.generate()
+    return key, key.public_key()
+
+
+def jwt_algorithms(args) -> dict:
+    from jwt import decode, encode  # noqa: PLC0415
+
+    payload = {
+        'sub': 'benchmark@example.com',
+        'exp': datetime.now(tz=timezone.utc) + timedelta(minutes=30),
+    }
+
+    results = {}
+    for algorithm in args.algorithms:
+        keys = signing_keys(algorithm)
+        if keys is None:
+            results[algorithm] = {'skipped': 'requires cryptography'}
+            continue
+
+        signing_key, verifying_key = keys
+        token = encode(payload, signing_key, algorithm=algorithm)
+        results[algorithm] = {
+            'encode': measure(
+                lambda: encode(payload, signing_key, algorithm=algorithm),
+                args.jwt_rounds,
+            ),
+            'decode': measure(
+                lambda: decode(token, verifying_key, algorithms=[algorithm]),
+                args.jwt_rounds,
+            ),
+        }
+    return results
+
+
+def configured(args) -> dict:
+    """
+    The application's own functions, with its current settings.
+    """
+    from jwt import decode  # noqa: PLC0415
+
+    from fastapi_do_zero.security import (  # noqa: PLC0415
+        create_access_token,
+        get_password_hash,
+        settings,
+        verify_password,
+    )
+
+    hashed = get_password_hash(PASSWORD)
+    token = create_access_token({'sub': 'benchmark@example.com'})
+
+    return {
+        'settings': {
+            'ARGON2_TIME_COST': settings.ARGON2_TIME_COST,
+            'ARGON2_MEMORY_COST': settings.ARGON2_MEMORY_COST,
+            'ARGON2_PARALLELISM': settings.ARGON2_PARALLELISM,
+            'ALGORITHM': settings.ALGORITHM,
+        },
+        'get_password_hash': measure(
+            lambda: get_password_hash(PASSWORD), args.rounds
+        ),
+        'verify_password': measure(
+            lambda: verify_password(PASSWORD, hashed), args.rounds
+        ),
+        'create_access_token': measure(
+            lambda: create_access_token({'sub': 'benchmark@example.com'}),
+            args.jwt_rounds,
+        ),
+        # The decode done by `get_current_user` on every request.
+        'decode_access_token': measure(
+            lambda: decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            ),
+            args.jwt_rounds,
+        ),
+    }
+
+
+def main(args):
+    configure_app('sqlite+aiosqlite:///:memory:')
+
+    argon2 = argon2_grid(args)
+    results = {
+        'cores': os.cpu_count(),
+        'configured': configured(args),
+        'argon2': argon2,
+        'recommendation': recommend(argon2, args.target_ms),
+        'jwt': jwt_algorithms(args),
+    }
+
+    write_report('security', results, args.output)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--time-costs', type=integers, default=[1, 2, 3])
+    parser.add_argument(
+        '--memory-costs',
+        type=integers,
+        default=[19456, 47104, 65536],
+        help='KiB, the defaults are the OWASP minimums and the current one',
+    )
+    parser.add_argument('--parallelism', type=integers, default=[1, 4])
+    parser.add_argument(
+        '--algorithms',
+        type=lambda value: value.split(','),
+        default=[*HMAC_ALGORITHMS, *ASYMMETRIC_ALGORITHMS],
+    )
+    parser.add_argument(
+        '--target-ms',
+        type=float,
+        default=250,
+        help='p95 password verification budget of a login',
+    )
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--jwt-rounds', type=int, default=2000)
+    parser.add_argument('--output')
+    main(parser.parse_args())
@@ -0,0 +1,93 @@
+"""
+Serialization cost of a `GET /todos` page: FastAPI's `response_model`
+path against `PydanticResponse`, per 1,000 todos and without a database.
+
+    python -m benchmarks.serialization --todos 1000
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from benchmarks.common import configure_app, summarize, write_report
+from fastapi_do_zero.models import Todo, TodoState
+from fastapi_do_zero.responses import PydanticResponse
+from fastapi_do_zero.schemas import TodoListSchema
+
+
+def make_todos(count: int) -> list[Todo]:
+    now = datetime.now()
+    todos = []
+    for n in range(count):
+        todo = Todo(
+            title=f'Todo {n}',
+            description='Serialization benchmark',
+            state=TodoState.todo,
+            user_id=1,
+        )
+        todo.id = n + 1
+        todo.created_at = todo.updated_at = now
+        todos.append(todo)
+    return todos
+
+
+async def measure(render, rounds: int) -> list[float]:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await render()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def main(args):
+    configure_app('sqlite+aiosqlite:///:memory:')
+    from fastapi_do_zero.app import app  # noqa: PLC0415
+
+    [route] = [
+        route
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        and route.path == '/todos/'
+        and 'GET' in route.methods
+    ]
+    todos = make_todos(args.todos)
+    content = {'todos': todos, 'next_cursor': None}
+
+    async def response_model():
+        # What FastAPI does with a dict returned by the endpoint.
+        data = await serialize_response(
+            field=route.response_field, response_content=content
+        )
+        return JSONResponse(data).body
+
+    async def pydantic_response():
+        return PydanticResponse(
+            TodoListSchema.model_validate(content, from_attributes=True)
+        ).body
+
+    assert await response_model() == await pydantic_response()
+
+    results = {
+        'todos': args.todos,
+        'response_model': summarize(
+            await measure(response_model, args.rounds)
+        ),
+        'pydantic_response': summarize(
+            await measure(pydantic_response, args.rounds)
+        ),
+    }
+
+    write_report('serialization', results, args.output)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--todos', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--output')
+    asyncio.run(main(parser.parse_args()))
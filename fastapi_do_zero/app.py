@@ -1,26 +1,74 @@
 import asyncio
 import sys
+from contextlib import asynccontextmanager
 from http import HTTPStatus
 from logging import getLogger
 
 from fastapi import FastAPI
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
 
+from fastapi_do_zero.database import engine, warm_up_pool
+from fastapi_do_zero.profiling import ProfilingMiddleware
 from fastapi_do_zero.routers import auth, todos, users
 from fastapi_do_zero.schemas import (
     Message,
 )
+from fastapi_do_zero.security import password_hasher
+from fastapi_do_zero.settings import Settings
+from fastapi_do_zero.slow_queries import SlowQueryLog
+from fastapi_do_zero.telemetry import MetricsMiddleware, instrument_engine
 
 if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up_pool(engine, Settings().DB_POOL_WARMUP)
+    if slow_query_log:
+        slow_query_log.start()
+    yield
+    if slow_query_log:
+        slow_query_log.stop()
+    password_hasher.shutdown()
+    await engine.dispose()
+
+
 app = FastAPI(
     title='FastAPI do Zero',
     description='Aplicação do curso de FastAPI do Zero',
     version='0.1.0',
     contact={'name': 'César Freire', 'email': 'iceesar@live.com'},
+    lifespan=lifespan,
 )
 
 logger = getLogger('uvicorn.error')
 
+settings = Settings()
+instrument_engine(engine)
+
+slow_query_log = None
+if settings.SLOW_QUERY_MS > 0:
+    slow_query_log = SlowQueryLog.from_settings(settings)
+    slow_query_log.instrument(engine)
+
+app.add_middleware(
+    MetricsMiddleware,
+    server_timing=settings.SERVER_TIMING_ENABLED,
+    slow_request_ms=settings.SLOW_REQUEST_MS,
+    slow_request_statements=settings.SLOW_REQUEST_STATEMENTS,
+)
+
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        token=settings.PROFILING_TOKEN,
+        output_dir=settings.PROFILING_OUTPUT_DIR,
+        interval_ms=settings.PROFILING_INTERVAL_MS,
+        max_per_minute=settings.PROFILING_MAX_PER_MINUTE,
+    )
+
 app.include_router(users.users_router)
 app.include_router(auth.auth_router)
 app.include_router(todos.todos_router)
@@ -29,3 +77,8 @@ app.include_router(todos.todos_router)
 @app.get('/status', status_code=HTTPStatus.OK, response_model=Message)
 async def read_root():
     return {'message': 'Up!'}
+
+
+@app.get('/metrics', include_in_schema=False)
+async def read_metrics():
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
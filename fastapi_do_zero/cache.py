@@ -0,0 +1,159 @@
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from logging import getLogger
+from threading import Lock
+from typing import Any, Literal
+
+logger = getLogger('uvicorn.error')
+
+
+class TTLCache:
+    """
+    In-process LRU cache whose entries expire after `ttl` seconds.
+
+    Once `max_size` entries are stored, the least recently used one is
+    evicted. A cache with `max_size` or `ttl` set to zero stores nothing.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._data),
+        }
+
+
+class LocalCache:
+    """
+    Cache of serialized values kept in each worker process.
+
+    Invalidations only reach the worker that makes them, other workers
+    serve their copy until it expires.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.entries = TTLCache(max_size=max_size, ttl=ttl)
+
+    async def get(self, key: str) -> bytes | None:
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: bytes):
+        self.entries.set(key, value)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self.entries.delete(key)
+
+
+class SharedCache:
+    """
+    Cache of serialized values kept in a Redis compatible server, shared
+    by every worker, so an invalidation is seen by all of them.
+
+    `client` is a `redis.asyncio.Redis`, or anything with the same async
+    `get`, `set(px=...)` and `delete`. The server being unavailable is
+    logged and treated as a cache miss.
+    """
+
+    def __init__(self, client: Any, ttl: float, prefix: str = 'cache:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> bytes | None:
+        try:
+            return await self.client.get(self.prefix + key)
+        except Exception as error:
+            logger.warning(f'Shared cache read failed: {error}')
+            return None
+
+    async def set(self, key: str, value: bytes):
+        if self.ttl <= 0:
+            return
+
+        try:
+            await self.client.set(
+                self.prefix + key, value, px=int(self.ttl * 1000)
+            )
+        except Exception as error:
+            logger.warning(f'Shared cache write failed: {error}')
+
+    async def delete(self, *keys: str):
+        try:
+            await self.client.delete(*(self.prefix + key for key in keys))
+        except Exception as error:
+            logger.error(f'Shared cache invalidation failed: {error}')
+
+
+def create_cache(
+    backend: Literal['memory', 'redis'],
+    *,
+    max_size: int,
+    ttl: float,
+    url: str,
+    prefix: str,
+) -> LocalCache | SharedCache:
+    if backend == 'memory':
+        return LocalCache(max_size=max_size, ttl=ttl)
+
+    try:
+        from redis.asyncio import Redis  # noqa: PLC0415
+    except ImportError as error:
+        raise RuntimeError(
+            'The redis cache backend requires the redis package'
+        ) from error
+
+    return SharedCache(Redis.from_url(url), ttl=ttl, prefix=prefix)
@@ -0,0 +1,63 @@
+import hashlib
+
+from sqlalchemy import Select, func, select
+
+from fastapi_do_zero.models import Todo, TodoListVersion
+from fastapi_do_zero.responses import etag_matches
+from fastapi_do_zero.schemas import ConditionalHeaders
+
+
+def todo_etag(todo: Todo) -> str:
+    """
+    Strong ETag of a todo. Holds its `version`, so `If-Match` can be
+    checked by the UPDATE itself.
+    """
+    return f'"{todo.id}-{todo.version}"'
+
+
+def parse_todo_etag(etag: str, todo_id: int) -> int | None:
+    """
+    The `version` held by an ETag from `todo_etag`, or None if it isn't
+    one for this todo.
+    """
+    if etag.startswith('W/'):
+        # If-Match uses the strong comparison.
+        return None
+
+    etag_id, _, version = etag.strip('"').partition('-')
+    if etag_id != str(todo_id):
+        return None
+
+    try:
+        return int(version)
+    except ValueError:
+        return None
+
+
+def todos_version(user_id: int) -> Select:
+    """
+    The number of writes to the todos of `user_id`, one row of
+    `todo_list_versions` bumped by the triggers.
+    """
+    return select(func.coalesce(func.max(TodoListVersion.version), 0)).where(
+        TodoListVersion.user_id == user_id
+    )
+
+
+def list_etag(user_id: int, version: int, query: str) -> str:
+    """
+    Weak ETag of a page of todos. Changes whenever a todo of the user is
+    created, updated or deleted, `query` keeps pages and filters apart.
+    """
+    key = f'{user_id}:{version}:{query}'.encode()
+    return f'W/"{hashlib.blake2b(key, digest_size=16).hexdigest()}"'
+
+
+def not_modified(conditions: ConditionalHeaders, etag: str) -> bool:
+    """
+    Whether a GET can be answered with 304.
+
+    Only If-None-Match is checked: no Last-Modified is sent, HTTP dates
+    have whole seconds and a todo can change twice within one.
+    """
+    return etag_matches(conditions.if_none_match, etag)
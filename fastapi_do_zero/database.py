@@ -1,8 +1,149 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import asyncio
+import time
+from logging import getLogger
 
+from sqlalchemy import AsyncAdaptedQueuePool, QueuePool, event, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+
+from fastapi_do_zero.metrics import DB_POOL_WAIT
 from fastapi_do_zero.settings import Settings
 
-engine = create_async_engine(Settings().DATABASE_URL)
+logger = getLogger('uvicorn.error')
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # Required for ON DELETE CASCADE
+    'foreign_keys': 'ON',
+    'busy_timeout': '5000',
+}
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool recording how long each checkout takes, waiting for a free
+    connection or opening a new one.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+
+
+def engine_options(settings: Settings) -> dict:
+    """
+    Keyword arguments for `create_async_engine` built from the settings.
+    """
+    url = make_url(settings.DATABASE_URL)
+    options = {
+        'pool_pre_ping': settings.DB_POOL_PRE_PING,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+    }
+
+    if url.get_backend_name() == 'sqlite' and url.database in {
+        None,
+        '',
+        ':memory:',
+    }:
+        # In-memory databases live in a single shared connection.
+        return options
+
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+
+    if url.get_backend_name() == 'postgresql':
+        connect_args = {}
+
+        if settings.DB_PGBOUNCER:
+            connect_args['prepare_threshold'] = None
+        elif settings.DB_STATEMENT_TIMEOUT_MS:
+            connect_args['options'] = (
+                f'-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}'
+            )
+
+        options['connect_args'] = connect_args
+
+    return options
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {pragma}={value}')
+    cursor.close()
+
+
+def statement_timeout_listener(timeout_ms: int):
+    """
+    `begin` listener setting the statement timeout of each transaction.
+    Behind pgbouncer's transaction pooling, options set when connecting
+    would stay on whichever server connection they were sent to.
+    """
+
+    def set_statement_timeout(connection):
+        connection.exec_driver_sql(
+            f'SET LOCAL statement_timeout = {int(timeout_ms)}'
+        )
+
+    return set_statement_timeout
+
+
+def create_engine(settings: Settings) -> AsyncEngine:
+    """
+    Create the application engine, tuned by the DB_* settings.
+    """
+    db_engine = create_async_engine(
+        settings.DATABASE_URL, **engine_options(settings)
+    )
+
+    if db_engine.dialect.name == 'sqlite':
+        event.listen(db_engine.sync_engine, 'connect', set_sqlite_pragmas)
+
+    if (
+        db_engine.dialect.name == 'postgresql'
+        and settings.DB_PGBOUNCER
+        and settings.DB_STATEMENT_TIMEOUT_MS
+    ):
+        event.listen(
+            db_engine.sync_engine,
+            'begin',
+            statement_timeout_listener(settings.DB_STATEMENT_TIMEOUT_MS),
+        )
+
+    return db_engine
+
+
+async def warm_up_pool(db_engine: AsyncEngine, connections: int):
+    """
+    Open pooled connections ahead of the first requests after a deploy.
+    """
+    if not isinstance(db_engine.pool, QueuePool):
+        return
+
+    connections = min(connections, db_engine.pool.size())
+
+    async def checkout():
+        async with db_engine.connect() as connection:
+            await connection.exec_driver_sql('SELECT 1')
+
+    try:
+        await asyncio.gather(*(checkout() for _ in range(connections)))
+    except Exception as error:
+        logger.warning(f'Database pool warm-up failed: {error}')
+
+
+engine = create_engine(Settings())
 
 
 async def get_session():  # pragma: no cover
@@ -20,3 +20,12 @@ class PermissionException(HTTPException):
             status_code=HTTPStatus.FORBIDDEN,
             detail=detail,
         )
+
+
+class HashingPoolBusyException(HTTPException):
+    def __init__(self, detail: str = 'Server is busy, try again later'):
+        super().__init__(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={'Retry-After': '1'},
+        )
@@ -9,3 +9,11 @@ class TodoNotFoundException(HTTPException):
             status_code=HTTPStatus.NOT_FOUND,
             detail=detail,
         )
+
+
+class TodoPreconditionFailedException(HTTPException):
+    def __init__(self, detail: str = 'Todo has been modified'):
+        super().__init__(
+            status_code=HTTPStatus.PRECONDITION_FAILED,
+            detail=detail,
+        )
@@ -0,0 +1,68 @@
+import csv
+import io
+from collections.abc import AsyncIterator
+from typing import Literal
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi_do_zero.models import Todo
+from fastapi_do_zero.schemas import TodoPublicSchema
+
+ExportFormat = Literal['ndjson', 'csv']
+
+EXPORT_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Rows fetched from the server-side cursor, and written, per chunk.
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_FIELDS = list(TodoPublicSchema.model_fields)
+
+
+def export_query(user_id: int) -> Select:
+    """
+    The exported columns, without loading ORM objects.
+    """
+    return (
+        select(*(getattr(Todo, field) for field in EXPORT_FIELDS))
+        .where(Todo.user_id == user_id)
+        .order_by(Todo.id)
+    )
+
+
+def format_rows(rows, export_format: ExportFormat) -> str:
+    todos = [TodoPublicSchema.model_validate(dict(row)) for row in rows]
+
+    if export_format == 'ndjson':
+        return ''.join(todo.model_dump_json() + '\n' for todo in todos)
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writerows(todo.model_dump(mode='json') for todo in todos)
+    return buffer.getvalue()
+
+
+async def export_todos(
+    session: AsyncSession, query: Select, export_format: ExportFormat
+) -> AsyncIterator[str]:
+    """
+    Stream the rows of `query` as NDJSON or CSV, one chunk at a time.
+
+    The response body is sent after the request dependencies have exited,
+    so the session is closed here once the export is done.
+    """
+    try:
+        result = await session.stream(
+            query.execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+
+        if export_format == 'csv':
+            yield ','.join(EXPORT_FIELDS) + '\r\n'
+
+        async for rows in result.mappings().partitions():
+            yield format_rows(rows, export_format)
+    finally:
+        await session.close()
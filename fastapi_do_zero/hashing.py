@@ -0,0 +1,123 @@
+import asyncio
+import time
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from dataclasses import asdict, dataclass
+from threading import Lock
+from typing import Callable, Literal, TypeVar
+
+from fastapi_do_zero.exceptions.auth import HashingPoolBusyException
+from fastapi_do_zero.metrics import (
+    PASSWORD_HASH_DURATION,
+    PASSWORD_HASH_QUEUE_WAIT,
+)
+
+T = TypeVar('T')
+
+
+def _timed_call(submitted_at: float, func: Callable[..., T], *args) -> tuple:
+    """
+    Run `func` inside a worker and measure how long it waited and ran.
+    `time.monotonic` is system-wide, so it is comparable across processes.
+    """
+    started_at = time.monotonic()
+    result = func(*args)
+    return result, started_at - submitted_at, time.monotonic() - started_at
+
+
+@dataclass
+class HashingStats:
+    """
+    Calls the pool ran and rejected; their timings are in the
+    `password_hash_*` histograms.
+    """
+
+    completed: int = 0
+    rejected: int = 0
+
+
+class HashingPool:
+    """
+    Bounded worker pool for CPU-bound password hashing.
+
+    At most `workers` hashes run at the same time and at most `max_queue`
+    more may wait for a worker; further calls are rejected with
+    `HashingPoolBusyException` instead of piling up behind the others.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_queue: int,
+        executor: Literal['thread', 'process'] = 'thread',
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor_type = executor
+        self.stats = HashingStats()
+        self._executor: Executor | None = None
+        self._lock = Lock()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.executor_type == 'process':
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix='password-hash',
+                    )
+            return self._executor
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """
+        Run `func(*args)` in the pool and await its result.
+        """
+        executor = self._get_executor()
+
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self.stats.rejected += 1
+                raise HashingPoolBusyException
+            self._pending += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            result, queue_wait, hash_time = await loop.run_in_executor(
+                executor, _timed_call, time.monotonic(), func, *args
+            )
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+        self.stats.completed += 1
+        PASSWORD_HASH_QUEUE_WAIT.labels(func.__name__).observe(queue_wait)
+        PASSWORD_HASH_DURATION.labels(func.__name__).observe(hash_time)
+        return result
+
+    def snapshot(self) -> dict:
+        """
+        Return the pool counters, including the current queue depth.
+        """
+        return {**asdict(self.stats), 'pending': self._pending}
+
+    def shutdown(self):
+        """
+        Stop the workers. The pool is recreated on its next use.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,234 @@
+import codecs
+import csv
+import json
+from collections import deque
+from collections.abc import AsyncIterator
+from typing import Literal
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi_do_zero.models import Todo
+from fastapi_do_zero.schemas import TodoSchema
+
+ImportFormat = Literal['ndjson', 'csv']
+
+# Valid rows written per COPY / executemany.
+IMPORT_BATCH_SIZE = 5000
+# Row errors kept in the report, the rest are only counted.
+IMPORT_MAX_ERRORS = 100
+# Lines a quoted CSV field may span.
+IMPORT_MAX_RECORD_LINES = 100
+
+IMPORT_COLUMNS = ('title', 'description', 'state', 'user_id')
+
+
+async def read_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Split a UTF-8 byte stream into lines, whatever the chunk boundaries.
+
+    Invalid bytes are kept as lone surrogates, so the row holding them is
+    reported by `parse_row` instead of failing the whole upload.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='surrogateescape')
+    pending = ''
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line.removesuffix('\r')
+
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def csv_fields(record: str) -> list[str] | None:
+    """
+    The fields of a CSV record, None if it isn't valid CSV.
+    """
+    try:
+        return next(csv.reader([record], strict=True), [])
+    except csv.Error:
+        return None
+
+
+async def read_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Join the lines of quoted fields spanning several lines into a single
+    record: a record is complete once its quotes are balanced. The first
+    non-empty record is the header.
+
+    A stray quote would otherwise swallow every following line. So a
+    multi-line record is cut back to its first line when it doesn't
+    parse, doesn't match the header, is still open at the end, or spans
+    more than `IMPORT_MAX_RECORD_LINES` lines. The lines after it are
+    read again, and the bad row only loses itself.
+    """
+    lines = aiter(lines)
+    replay: deque[str] = deque()
+    record: list[str] = []
+    columns = None
+
+    while True:
+        if replay:
+            line = replay.popleft()
+        else:
+            line = await anext(lines, None)
+            if line is None and not record:
+                return
+
+        if line is not None:
+            record.append(line)
+            text = '\n'.join(record)
+            is_open = text.count('"') % 2 == 1
+            if is_open and len(record) <= IMPORT_MAX_RECORD_LINES:
+                continue
+
+            fields = None if is_open else csv_fields(text)
+            if len(record) == 1 or (
+                fields is not None
+                and (columns is None or len(fields) == columns)
+            ):
+                if columns is None and text.strip():
+                    columns = len(fields or ())
+                yield text
+                record = []
+                continue
+
+        # The first line is reported as a row, the others read again.
+        yield record[0]
+        replay.extendleft(reversed(record[1:]))
+        record = []
+
+
+async def read_rows(
+    chunks: AsyncIterator[bytes], import_format: ImportFormat
+) -> AsyncIterator[tuple[int, str, list[str] | None]]:
+    """
+    Yield `(row number, raw row, CSV header)` for every non-empty row.
+    """
+    lines = read_lines(chunks)
+    if import_format == 'ndjson':
+        row = 0
+        async for line in lines:
+            if line.strip():
+                row += 1
+                yield row, line, None
+        return
+
+    header = None
+    row = 0
+    async for record in read_csv_records(lines):
+        if not record.strip():
+            continue
+        if header is None:
+            header = next(csv.reader([record]))
+            continue
+        row += 1
+        yield row, record, header
+
+
+def parse_row(raw: str, header: list[str] | None) -> dict:
+    """
+    Raises ValueError if the row isn't valid UTF-8, a JSON object or a
+    CSV record matching the header.
+    """
+    try:
+        raw.encode('utf-8')
+    except UnicodeEncodeError:
+        raise ValueError('Invalid UTF-8')
+
+    if header is None:
+        values = json.loads(raw)
+        if not isinstance(values, dict):
+            raise ValueError('Expected a JSON object')
+        return values
+
+    try:
+        values = next(csv.reader([raw], strict=True))
+    except csv.Error as error:
+        raise ValueError(str(error))
+    if len(values) != len(header):
+        raise ValueError(f'Expected {len(header)} columns, got {len(values)}')
+    return dict(zip(header, values))
+
+
+async def copy_todos(session: AsyncSession, rows: list[tuple]):
+    """
+    Load rows with the COPY protocol, inside the session's transaction.
+    """
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    columns = ', '.join(IMPORT_COLUMNS)
+
+    async with raw_connection.driver_connection.cursor() as cursor:
+        async with cursor.copy(f'COPY todos ({columns}) FROM STDIN') as copy:
+            for row in rows:
+                await copy.write_row(row)
+
+
+async def write_todos(
+    session: AsyncSession, user_id: int, todos: list[TodoSchema]
+):
+    rows = [
+        (todo.title, todo.description, todo.state.value, user_id)
+        for todo in todos
+    ]
+
+    if session.get_bind().dialect.name == 'postgresql':
+        await copy_todos(session, rows)
+    else:
+        await session.execute(
+            insert(Todo), [dict(zip(IMPORT_COLUMNS, row)) for row in rows]
+        )
+
+
+def add_error(report: dict, row: int, detail: str):
+    report['failed'] += 1
+    if len(report['errors']) < IMPORT_MAX_ERRORS:
+        report['errors'].append({'row': row, 'detail': detail})
+
+
+async def import_todos(
+    session: AsyncSession,
+    user_id: int,
+    chunks: AsyncIterator[bytes],
+    import_format: ImportFormat,
+) -> dict:
+    """
+    Validate and insert the todos of an uploaded CSV or NDJSON file.
+
+    Invalid rows are reported and skipped, the valid ones are written in
+    batches of `IMPORT_BATCH_SIZE` and committed together at the end.
+    """
+    report = {'imported': 0, 'failed': 0, 'errors': []}
+    batch = []
+
+    async for row, raw, header in read_rows(chunks, import_format):
+        try:
+            batch.append(TodoSchema.model_validate(parse_row(raw, header)))
+        except ValidationError as error:
+            detail = '; '.join(
+                f'{".".join(map(str, e["loc"]))}: {e["msg"]}'
+                for e in error.errors()
+            )
+            add_error(report, row, detail)
+            continue
+        except ValueError as error:
+            add_error(report, row, str(error))
+            continue
+
+        if len(batch) == IMPORT_BATCH_SIZE:
+            await write_todos(session, user_id, batch)
+            report['imported'] += len(batch)
+            batch = []
+
+    if batch:
+        await write_todos(session, user_id, batch)
+        report['imported'] += len(batch)
+
+    await session.commit()
+    return report
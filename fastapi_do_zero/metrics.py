@@ -0,0 +1,149 @@
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+HTTP_REQUESTS = Counter(
+    'http_requests_total',
+    'HTTP requests handled.',
+    ('method', 'route', 'status'),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'Time to handle an HTTP request, until its response is sent.',
+    ('method', 'route'),
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress',
+    'HTTP requests being handled.',
+    ('method',),
+)
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    'db_statements_per_request',
+    'SQL statements executed while handling an HTTP request.',
+    ('route',),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50),
+)
+DB_POOL_SIZE = Gauge('db_pool_size', 'Connections kept by the pool.')
+DB_POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out', 'Pool connections currently in use.'
+)
+DB_POOL_OVERFLOW = Gauge(
+    'db_pool_overflow',
+    'Connections opened beyond the pool size, negative while the pool '
+    'is not full yet.',
+)
+DB_POOL_WAIT = Histogram(
+    'db_pool_wait_seconds',
+    'Time spent waiting to check out a pool connection.',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+PASSWORD_HASH_DURATION = Histogram(
+    'password_hash_duration_seconds',
+    'Time spent hashing or verifying a password in the hashing pool.',
+    ('operation',),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    'password_hash_queue_wait_seconds',
+    'Time a password hash waited for a hashing pool worker.',
+    ('operation',),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+PASSWORD_REHASHES = Counter(
+    'password_rehashes_total',
+    'Password hashes upgraded to the current Argon2 parameters on login.',
+    ('result',),
+)
+JWT_DECODE_FAILURES = Counter(
+    'jwt_decode_failures_total',
+    'Access tokens rejected while authenticating a request.',
+    ('reason',),
+)
+
+
+class CacheCollector(Collector):
+    """
+    Export the statistics a `TTLCache` keeps, read when /metrics is
+    scraped so lookups don't update a metric too.
+    """
+
+    def __init__(self, name: str, cache):
+        self.name = name
+        self.cache = cache
+
+    def collect(self):
+        stats = self.cache.stats()
+
+        lookups = CounterMetricFamily(
+            f'{self.name}_lookups',
+            'Cache lookups, by whether the entry was found.',
+            labels=('result',),
+        )
+        lookups.add_metric(('hit',), stats['hits'])
+        lookups.add_metric(('miss',), stats['misses'])
+        yield lookups
+
+        yield CounterMetricFamily(
+            f'{self.name}_evictions',
+            'Entries evicted to stay within the cache size.',
+            value=stats['evictions'],
+        )
+        yield GaugeMetricFamily(
+            f'{self.name}_entries',
+            'Entries stored in the cache.',
+            value=stats['size'],
+        )
+
+
+class SingleFlightCollector(Collector):
+    """
+    Export the calls a `SingleFlight` ran and the ones it collapsed into
+    a call already in flight, read when /metrics is scraped.
+    """
+
+    def __init__(self, name: str, single_flight):
+        self.name = name
+        self.single_flight = single_flight
+
+    def collect(self):
+        snapshot = self.single_flight.snapshot()
+
+        calls = CounterMetricFamily(
+            f'{self.name}_calls',
+            'Calls, by whether they ran or waited for one in flight.',
+            labels=('result',),
+        )
+        calls.add_metric(('executed',), snapshot['executed'])
+        calls.add_metric(('collapsed',), snapshot['collapsed'])
+        yield calls
+
+        yield GaugeMetricFamily(
+            f'{self.name}_in_flight',
+            'Calls running, each with any number of callers waiting.',
+            value=snapshot['in_flight'],
+        )
+
+
+class HashingPoolCollector(Collector):
+    """
+    Export the calls a `HashingPool` rejected because its queue was full
+    and how many are running or queued, read when /metrics is scraped.
+    """
+
+    def __init__(self, name: str, pool):
+        self.name = name
+        self.pool = pool
+
+    def collect(self):
+        snapshot = self.pool.snapshot()
+
+        yield CounterMetricFamily(
+            f'{self.name}_rejected',
+            'Calls rejected with 503 because the queue was full.',
+            value=snapshot['rejected'],
+        )
+        yield GaugeMetricFamily(
+            f'{self.name}_pending',
+            'Calls running in a worker or waiting for one.',
+            value=snapshot['pending'],
+        )
@@ -1,15 +1,69 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    ForeignKey,
+    Index,
+    event,
+    func,
+    literal_column,
+    text,
+)
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
+from sqlalchemy.sql.expression import FunctionElement
 
 table_registry = registry()
 
 
+class ChangeId(FunctionElement):
+    """
+    Position of a write in `GET /todos/changes`: the id of the writing
+    transaction on PostgreSQL, the current second on SQLite, which runs
+    one write transaction at a time.
+    """
+
+    type = BigInteger()
+    inherit_cache = True
+
+
+class ChangeHorizon(FunctionElement):
+    """
+    Changes below it are committed, and no transaction can still write
+    one: the oldest transaction in progress on PostgreSQL, the current
+    second on SQLite. Transaction ids are assigned when a transaction
+    starts writing, not when it commits, so a newer change can be
+    visible before an older one.
+    """
+
+    type = BigInteger()
+    inherit_cache = True
+
+
+@compiles(ChangeId, 'postgresql')
+def _change_id_postgresql(element, compiler, **kw):
+    return 'CAST(CAST(pg_current_xact_id() AS TEXT) AS BIGINT)'
+
+
+@compiles(ChangeHorizon, 'postgresql')
+def _change_horizon_postgresql(element, compiler, **kw):
+    return (
+        'CAST(CAST(pg_snapshot_xmin(pg_current_snapshot()) AS TEXT) AS BIGINT)'
+    )
+
+
+@compiles(ChangeId, 'sqlite')
+@compiles(ChangeHorizon, 'sqlite')
+def _current_second_sqlite(element, compiler, **kw):
+    return "CAST(strftime('%s', 'now') AS INTEGER)"
+
+
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
+    __mapper_args__ = {'eager_defaults': True}
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     username: Mapped[str] = mapped_column(unique=True)
@@ -17,7 +71,12 @@ class User:
     password: Mapped[str]
 
     todos: Mapped[list['Todo']] = relationship(
-        init=False, cascade='all, delete-orphan', lazy='selectin'
+        init=False,
+        repr=False,
+        compare=False,
+        cascade='all, delete-orphan',
+        lazy='raise',
+        passive_deletes=True,
     )
 
     created_at: Mapped[datetime] = mapped_column(
@@ -39,13 +98,26 @@ class TodoState(str, Enum):
 @table_registry.mapped_as_dataclass
 class Todo:
     __tablename__ = 'todos'
+    __mapper_args__ = {'eager_defaults': True}
+    __table_args__ = (
+        Index('ix_todos_user_id_id', 'user_id', 'id'),
+        Index('ix_todos_user_id_state_id', 'user_id', 'state', 'id'),
+        Index('ix_todos_user_id_change_id_id', 'user_id', 'change_id', 'id'),
+        Index(
+            'ix_todos_search',
+            text("to_tsvector('simple', title || ' ' || description)"),
+            postgresql_using='gin',
+        ).ddl_if(dialect='postgresql'),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str]
     description: Mapped[str]
     state: Mapped[TodoState]
 
-    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE')
+    )
 
     created_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
@@ -53,3 +125,313 @@ class Todo:
     updated_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now(), onupdate=func.now()
     )
+    # Bumped by every UPDATE, the ETag of the todo. `updated_at` can't
+    # tell apart two writes within the same second on SQLite.
+    version: Mapped[int] = mapped_column(
+        init=False,
+        server_default=text('1'),
+        onupdate=literal_column('todos.version') + 1,
+    )
+    # Also a client side default: SQLite can't add a column with an
+    # expression as default to an existing table.
+    change_id: Mapped[int] = mapped_column(
+        BigInteger,
+        init=False,
+        default=ChangeId(),
+        server_default=ChangeId(),
+        onupdate=ChangeId(),
+    )
+
+
+# SQLite full-text index of the todos, an external content FTS5 table
+# kept in sync by triggers; `fastapi_do_zero.search` queries it.
+for statement in (
+    """
+    CREATE VIRTUAL TABLE todos_fts USING fts5(
+        title, description, content='todos', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN
+        INSERT INTO todos_fts (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN
+        INSERT INTO todos_fts (todos_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER todos_fts_update AFTER UPDATE OF title, description
+    ON todos BEGIN
+        INSERT INTO todos_fts (todos_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO todos_fts (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+):
+    event.listen(
+        Todo.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='sqlite'),
+    )
+
+event.listen(
+    Todo.__table__,
+    'after_drop',
+    DDL('DROP TABLE IF EXISTS todos_fts').execute_if(dialect='sqlite'),
+)
+
+
+@table_registry.mapped_as_dataclass
+class TodoTombstone:
+    """
+    A deleted todo, kept so `GET /todos/changes` can report the deletion.
+    """
+
+    __tablename__ = 'todo_tombstones'
+    __mapper_args__ = {'eager_defaults': True}
+    __table_args__ = (
+        Index(
+            'ix_todo_tombstones_user_id_change_id',
+            'user_id',
+            'change_id',
+            'todo_id',
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    todo_id: Mapped[int]
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE')
+    )
+
+    deleted_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+    change_id: Mapped[int] = mapped_column(
+        BigInteger, init=False, default=ChangeId(), server_default=ChangeId()
+    )
+
+
+@table_registry.mapped_as_dataclass
+class TodoStateCount:
+    """
+    Number of todos of a user in each state, kept up to date by the
+    triggers below.
+    """
+
+    __tablename__ = 'todo_state_counts'
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), primary_key=True
+    )
+    state: Mapped[TodoState] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+
+
+@table_registry.mapped_as_dataclass
+class TodoDailyCount:
+    """
+    Number of todos a user created each day, kept up to date by the
+    triggers below. Deleting a todo doesn't change it.
+    """
+
+    __tablename__ = 'todo_daily_counts'
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), primary_key=True
+    )
+    day: Mapped[date] = mapped_column(primary_key=True)
+    created: Mapped[int] = mapped_column(default=0)
+
+
+@table_registry.mapped_as_dataclass
+class TodoListVersion:
+    """
+    Number of writes to the todos of a user, bumped by the triggers below
+    on every statement touching them: the ETag of the user's todo list.
+    """
+
+    __tablename__ = 'todo_list_versions'
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), primary_key=True
+    )
+    version: Mapped[int] = mapped_column(default=0)
+
+
+# The counters are maintained by the database, so every way todos are
+# written (bulk statements, COPY, ON DELETE CASCADE) keeps them right.
+# PostgreSQL aggregates once per statement through transition tables,
+# which keeps bulk writes and imports from updating a counter per row.
+POSTGRESQL_COUNTERS = (
+    """
+    CREATE OR REPLACE FUNCTION todos_update_counts() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO todo_state_counts (user_id, state, count)
+            SELECT user_id, state, count(*) FROM new_rows
+            GROUP BY user_id, state ORDER BY user_id, state
+            ON CONFLICT (user_id, state) DO UPDATE
+            SET count = todo_state_counts.count + excluded.count;
+
+            INSERT INTO todo_daily_counts (user_id, day, created)
+            SELECT user_id, CAST(created_at AS DATE), count(*) FROM new_rows
+            GROUP BY 1, 2 ORDER BY 1, 2
+            ON CONFLICT (user_id, day) DO UPDATE
+            SET created = todo_daily_counts.created + excluded.created;
+
+        ELSIF TG_OP = 'UPDATE' THEN
+            INSERT INTO todo_state_counts (user_id, state, count)
+            SELECT user_id, state, sum(delta) FROM (
+                SELECT user_id, state, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT user_id, state, -1 AS delta FROM old_rows
+            ) AS changes
+            GROUP BY user_id, state HAVING sum(delta) <> 0
+            ORDER BY user_id, state
+            ON CONFLICT (user_id, state) DO UPDATE
+            SET count = todo_state_counts.count + excluded.count;
+
+        ELSE
+            -- No upsert: with ON DELETE CASCADE the user, and its
+            -- counters, may already be gone.
+            UPDATE todo_state_counts
+            SET count = todo_state_counts.count - removed.count
+            FROM (
+                SELECT user_id, state, count(*) AS count FROM old_rows
+                GROUP BY user_id, state
+            ) AS removed
+            WHERE todo_state_counts.user_id = removed.user_id
+            AND todo_state_counts.state = removed.state;
+        END IF;
+
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION todos_update_version() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            UPDATE todo_list_versions SET version = version + 1
+            WHERE user_id IN (SELECT user_id FROM old_rows);
+        ELSE
+            INSERT INTO todo_list_versions (user_id, version)
+            SELECT DISTINCT user_id, 1 FROM new_rows ORDER BY user_id
+            ON CONFLICT (user_id) DO UPDATE
+            SET version = todo_list_versions.version + 1;
+        END IF;
+
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE TRIGGER todos_counts_insert AFTER INSERT ON todos
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION todos_update_counts()
+    """,
+    """
+    CREATE TRIGGER todos_counts_update AFTER UPDATE ON todos
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION todos_update_counts()
+    """,
+    """
+    CREATE TRIGGER todos_counts_delete AFTER DELETE ON todos
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION todos_update_counts()
+    """,
+    """
+    CREATE TRIGGER todos_version_insert AFTER INSERT ON todos
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION todos_update_version()
+    """,
+    """
+    CREATE TRIGGER todos_version_update AFTER UPDATE ON todos
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION todos_update_version()
+    """,
+    """
+    CREATE TRIGGER todos_version_delete AFTER DELETE ON todos
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION todos_update_version()
+    """,
+)
+
+SQLITE_COUNTERS = (
+    """
+    CREATE TRIGGER todos_counts_insert AFTER INSERT ON todos BEGIN
+        INSERT INTO todo_state_counts (user_id, state, count)
+        VALUES (new.user_id, new.state, 1)
+        ON CONFLICT (user_id, state) DO UPDATE SET count = count + 1;
+        INSERT INTO todo_daily_counts (user_id, day, created)
+        VALUES (new.user_id, date(new.created_at), 1)
+        ON CONFLICT (user_id, day) DO UPDATE SET created = created + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER todos_counts_update AFTER UPDATE OF user_id, state
+    ON todos BEGIN
+        UPDATE todo_state_counts SET count = count - 1
+        WHERE user_id = old.user_id AND state = old.state;
+        INSERT INTO todo_state_counts (user_id, state, count)
+        VALUES (new.user_id, new.state, 1)
+        ON CONFLICT (user_id, state) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER todos_counts_delete AFTER DELETE ON todos BEGIN
+        UPDATE todo_state_counts SET count = count - 1
+        WHERE user_id = old.user_id AND state = old.state;
+    END
+    """,
+    """
+    CREATE TRIGGER todos_version_insert AFTER INSERT ON todos BEGIN
+        INSERT INTO todo_list_versions (user_id, version)
+        VALUES (new.user_id, 1)
+        ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER todos_version_update AFTER UPDATE ON todos BEGIN
+        INSERT INTO todo_list_versions (user_id, version)
+        VALUES (new.user_id, 1)
+        ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER todos_version_delete AFTER DELETE ON todos BEGIN
+        UPDATE todo_list_versions SET version = version + 1
+        WHERE user_id = old.user_id;
+    END
+    """,
+)
+
+# Created with the todos table, like the FTS5 triggers: `create_all` on a
+# database that already has it leaves the triggers alone.
+for dialect, statements in (
+    ('postgresql', POSTGRESQL_COUNTERS),
+    ('sqlite', SQLITE_COUNTERS),
+):
+    for statement in statements:
+        event.listen(
+            Todo.__table__,
+            'after_create',
+            DDL(statement).execute_if(dialect=dialect),
+        )
+
+for function in ('todos_update_counts()', 'todos_update_version()'):
+    event.listen(
+        table_registry.metadata,
+        'after_drop',
+        DDL(f'DROP FUNCTION IF EXISTS {function}').execute_if(
+            dialect='postgresql'
+        ),
+    )
@@ -0,0 +1,40 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections.abc import Sequence
+from typing import Any
+
+
+def encode_cursor(payload: dict[str, Any]) -> str:
+    """
+    Encode the position of the last row of a page as an opaque cursor.
+    """
+    data = json.dumps(payload, separators=(',', ':')).encode()
+    return urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """
+    Decode a cursor created by `encode_cursor`.
+    Raises ValueError if the cursor is malformed.
+    """
+    try:
+        data = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(data)
+    except (BinasciiError, UnicodeDecodeError, ValueError):
+        raise ValueError('Invalid cursor')
+
+    if not isinstance(payload, dict) or not isinstance(payload.get('id'), int):
+        raise ValueError('Invalid cursor')
+
+    return payload
+
+
+def next_cursor(rows: Sequence[Any], limit: int) -> str | None:
+    """
+    Return the cursor of the page after `rows`, or None on the last page.
+    """
+    if not limit or len(rows) < limit:
+        return None
+
+    return encode_cursor({'id': rows[-1].id})
@@ -0,0 +1,176 @@
+import asyncio
+import hmac
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from logging import getLogger
+from pathlib import Path
+from types import FrameType
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = getLogger('uvicorn.error')
+
+PROFILE_HEADER = b'x-profile'
+
+
+def frame_stack(frame: FrameType | None) -> list[str]:
+    """
+    The functions of a stack, outermost first.
+    """
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(
+            f'{code.co_qualname} ({code.co_filename}:{code.co_firstlineno})'
+        )
+        frame = frame.f_back
+    return stack[::-1]
+
+
+class StackSampler:
+    """
+    Sampling profiler: a thread recording the stack of every other thread
+    each `interval` seconds, in the collapsed format read by flamegraph
+    tools (`thread;outer;...;inner count`).
+
+    Requests share the event loop thread, so concurrent requests show up
+    in the profile too; hashing pool threads are named `password-hash`.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name='profiler', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        for ident, frame in sys._current_frames().items():
+            if ident != own:
+                thread = names.get(ident, str(ident))
+                self.stacks[';'.join([thread, *frame_stack(frame)])] += 1
+
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        return ''.join(
+            f'{stack} {count}\n' for stack, count in self.stacks.items()
+        )
+
+
+class RateLimiter:
+    """
+    Allow at most `limit` calls per `period` seconds.
+    """
+
+    def __init__(self, limit: int, period: float):
+        self.limit = limit
+        self.period = period
+        self._calls: deque[float] = deque()
+
+    def acquire(self) -> bool:
+        now = time.monotonic()
+        while self._calls and self._calls[0] <= now - self.period:
+            self._calls.popleft()
+
+        if len(self._calls) >= self.limit:
+            return False
+
+        self._calls.append(now)
+        return True
+
+
+class ProfilingMiddleware:
+    """
+    Profile the requests sending `X-Profile: <token>`.
+
+    The profile is written to `output_dir` as `<id>.folded` and its id is
+    sent back in the `X-Profile` header. One request is profiled at a
+    time and at most `max_per_minute` per minute; requests that can't be
+    profiled, or send a wrong token, are handled as usual.
+
+    Only added to the app when profiling is enabled, so it costs nothing
+    otherwise.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        token: str,
+        output_dir: str,
+        interval_ms: float = 1,
+        max_per_minute: int = 6,
+    ):
+        self.app = app
+        self.token = token.encode()
+        self.output_dir = Path(output_dir)
+        self.interval = interval_ms / 1000
+        self.limiter = RateLimiter(max_per_minute, 60)
+        self._active = False
+
+    def authorized(self, scope: Scope) -> bool:
+        if not self.token:
+            return False
+
+        for name, value in scope['headers']:
+            if name == PROFILE_HEADER:
+                return hmac.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope['type'] != 'http'
+            or not self.authorized(scope)
+            or self._active
+            or not self.limiter.acquire()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message: Message):
+            if message['type'] == 'http.response.start':
+                MutableHeaders(scope=message).append('X-Profile', profile_id)
+            await send(message)
+
+        self._active = True
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            self._active = False
+            await asyncio.to_thread(self.write, profile_id, sampler)
+            logger.info(
+                f'Profiled {scope["method"]} {scope["path"]}: '
+                f'{sampler.samples} samples in {profile_id}.folded'
+            )
+
+    def write(self, profile_id: str, sampler: StackSampler):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f'{profile_id}.folded'
+        path.write_text(sampler.collapsed(), encoding='utf-8')
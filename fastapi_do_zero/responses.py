@@ -0,0 +1,43 @@
+import hashlib
+from typing import Any
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from fastapi_do_zero.telemetry import timed
+
+
+class PydanticResponse(Response):
+    """
+    JSON response rendered straight to bytes by pydantic's serializer.
+
+    Returning it skips FastAPI's `response_model` handling, which would
+    validate the already validated model again and encode it through
+    `jsonable_encoder` and `json.dumps`. Keep `response_model` on the
+    route for the OpenAPI schema.
+    """
+
+    media_type = 'application/json'
+
+    @staticmethod
+    def render(content: BaseModel | Any) -> bytes:
+        with timed('serialize'):
+            return to_json(content)
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(header: str | None, etag: str) -> bool:
+    """
+    Weak comparison of `etag` against an If-None-Match header.
+    """
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+
+    tags = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return etag.removeprefix('W/') in tags
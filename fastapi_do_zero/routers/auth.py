@@ -2,12 +2,13 @@ from http import HTTPStatus
 from logging import getLogger
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from fastapi_do_zero.database import get_session
+from fastapi_do_zero.database import engine, get_session
+from fastapi_do_zero.metrics import PASSWORD_REHASHES
 from fastapi_do_zero.models import User
 from fastapi_do_zero.schemas import (
     JWTToken,
@@ -15,7 +16,10 @@ from fastapi_do_zero.schemas import (
 from fastapi_do_zero.security import (
     create_access_token,
     get_current_user,
-    verify_password,
+    get_password_hash_async,
+    invalidate_principal,
+    password_needs_rehash,
+    verify_password_async,
 )
 
 auth_router = APIRouter(prefix='/auth', tags=['auth'])
@@ -27,8 +31,44 @@ CurrentUser = Annotated[User, Depends(get_current_user)]
 logger = getLogger('uvicorn.error')
 
 
+async def upgrade_password_hash(
+    user_id: int, email: str, old_hash: str, password: str
+):
+    """
+    Hash a password again with the current parameters.
+
+    Runs after the login response is sent, when the request's session is
+    already closed, so it uses its own. The hash is only replaced if it
+    is still `old_hash`, so a password changed meanwhile is kept.
+    """
+    try:
+        new_hash = await get_password_hash_async(password)
+        async with AsyncSession(engine) as session:
+            result = await session.execute(
+                update(User)
+                .where(User.id == user_id, User.password == old_hash)
+                .values(password=new_hash)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+    except Exception as error:
+        PASSWORD_REHASHES.labels('failed').inc()
+        logger.warning(
+            f'Password hash upgrade of user {user_id} failed: {error}'
+        )
+        return
+
+    if result.rowcount:
+        PASSWORD_REHASHES.labels('upgraded').inc()
+        invalidate_principal(email)
+    else:
+        PASSWORD_REHASHES.labels('skipped').inc()
+
+
 @auth_router.post('/token', response_model=JWTToken, status_code=HTTPStatus.OK)
-async def login_for_access_token(session: Session, form_data: OAuth2Form):
+async def login_for_access_token(
+    session: Session, form_data: OAuth2Form, background_tasks: BackgroundTasks
+):
     user = await session.scalar(
         select(User).where(User.email == form_data.username)
     )
@@ -40,13 +80,22 @@ async def login_for_access_token(session: Session, form_data: OAuth2Form):
             detail='Incorrect email or password',
         )
 
-    if not verify_password(form_data.password, user.password):
+    if not await verify_password_async(form_data.password, user.password):
         logger.warning(f'Incorrect password for user {form_data.username}.')
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail='Incorrect email or password',
         )
 
+    if password_needs_rehash(user.password):
+        background_tasks.add_task(
+            upgrade_password_hash,
+            user.id,
+            user.email,
+            user.password,
+            form_data.password,
+        )
+
     access_token = create_access_token(data={'sub': user.email})
 
     return JWTToken(
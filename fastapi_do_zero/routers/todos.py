@@ -1,53 +1,244 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Body, Depends, Header, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import REGISTRY
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from fastapi_do_zero.conditional import (
+    list_etag,
+    not_modified,
+    parse_todo_etag,
+    todo_etag,
+    todos_version,
+)
 from fastapi_do_zero.database import get_session
-from fastapi_do_zero.exceptions.todo import TodoNotFoundException
+from fastapi_do_zero.exceptions.todo import (
+    TodoNotFoundException,
+    TodoPreconditionFailedException,
+)
+from fastapi_do_zero.export import (
+    EXPORT_MEDIA_TYPES,
+    ExportFormat,
+    export_query,
+    export_todos,
+)
+from fastapi_do_zero.importer import ImportFormat, import_todos
+from fastapi_do_zero.metrics import SingleFlightCollector
 from fastapi_do_zero.models import Todo, User
+from fastapi_do_zero.pagination import encode_cursor, next_cursor
+from fastapi_do_zero.responses import PydanticResponse
 from fastapi_do_zero.schemas import (
+    BULK_MAX_ITEMS,
+    ConditionalHeaders,
     FilterTodoParams,
     Message,
+    PreconditionHeaders,
+    TodoBulkResponseSchema,
+    TodoBulkUpdateSchema,
+    TodoChangesParams,
+    TodoChangesSchema,
+    TodoImportSchema,
     TodoListSchema,
     TodoPublicSchema,
     TodoSchema,
+    TodoStatsParams,
+    TodoStatsSchema,
     TodoUpdateSchema,
 )
+from fastapi_do_zero.search import search_todos
 from fastapi_do_zero.security import get_current_user
+from fastapi_do_zero.singleflight import SingleFlight
+from fastapi_do_zero.stats import todo_stats
+from fastapi_do_zero.sync import delete_todos, todo_changes
 
 todos_router = APIRouter(prefix='/todos', tags=['todos'])
 
 Session = Annotated[AsyncSession, Depends(get_session)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
+BulkCreate = Annotated[
+    list[TodoSchema], Body(min_length=1, max_length=BULK_MAX_ITEMS)
+]
+BulkUpdate = Annotated[
+    list[TodoBulkUpdateSchema], Body(min_length=1, max_length=BULK_MAX_ITEMS)
+]
+BulkDelete = Annotated[
+    list[int], Body(min_length=1, max_length=BULK_MAX_ITEMS)
+]
+Conditions = Annotated[ConditionalHeaders, Header()]
 
+todo_pages = SingleFlight()
+REGISTRY.register(SingleFlightCollector('todo_pages', todo_pages))
 
-@todos_router.get('/', response_model=TodoListSchema)
+NOT_MODIFIED = {HTTPStatus.NOT_MODIFIED: {'description': 'Not Modified'}}
+
+
+@todos_router.get('/', response_model=TodoListSchema, responses=NOT_MODIFIED)
 async def list_todos(
+    request: Request,
     session: Session,
     user: CurrentUser,
     todo_filter: Annotated[FilterTodoParams, Query()],
+    conditions: Conditions,
 ):
-    query = select(Todo).where(Todo.user_id == user.id)
+    version = await session.scalar(todos_version(user.id))
+    headers = {'ETag': list_etag(user.id, version, request.url.query)}
+    if not_modified(conditions, headers['ETag']):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    async def load_page() -> bytes:
+        query = select(Todo).where(Todo.user_id == user.id)
+
+        if todo_filter.title:
+            query = query.filter(Todo.title.contains(todo_filter.title))
+
+        if todo_filter.description:
+            query = query.filter(
+                Todo.description.contains(todo_filter.description)
+            )
+
+        if todo_filter.state:
+            query = query.filter(Todo.state == todo_filter.state)
+
+        if todo_filter.q:
+            query = search_todos(
+                query, todo_filter.q, session.get_bind().dialect.name
+            )
+
+        if todo_filter.after_id is not None:
+            query = query.where(Todo.id > todo_filter.after_id)
+        else:
+            query = query.offset(todo_filter.offset)
+
+        todos = await session.scalars(
+            query.order_by(Todo.id).limit(todo_filter.limit)
+        )
+        todos = todos.all()
 
-    if todo_filter.title:
-        query = query.filter(Todo.title.contains(todo_filter.title))
+        cursor = None
+        if not todo_filter.q:
+            cursor = next_cursor(todos, todo_filter.limit)
 
-    if todo_filter.description:
-        query = query.filter(
-            Todo.description.contains(todo_filter.description)
+        return PydanticResponse.render(
+            TodoListSchema.model_validate(
+                {'todos': todos, 'next_cursor': cursor}, from_attributes=True
+            )
         )
 
-    if todo_filter.state:
-        query = query.filter(Todo.state == todo_filter.state)
+    # Identical pages requested at the same time (retries, several tabs)
+    # share one query. The key holds the version, so a request made after
+    # a write never gets a page read before it.
+    body = await todo_pages.do(
+        (user.id, version, todo_filter.model_dump_json()),
+        load_page,
+    )
+
+    return Response(
+        body, media_type=PydanticResponse.media_type, headers=headers
+    )
+
 
-    todos = await session.scalars(
-        query.offset(todo_filter.offset).limit(todo_filter.limit)
+@todos_router.get('/changes', response_model=TodoChangesSchema)
+async def list_todo_changes(
+    session: Session,
+    user: CurrentUser,
+    params: Annotated[TodoChangesParams, Query()],
+):
+    changes = await session.execute(
+        todo_changes(user.id, params.position, params.limit)
     )
+    changes = changes.all()
+
+    changed_ids = [change.id for change in changes if not change.deleted]
+    todos = {}
+    if changed_ids:
+        todos = await session.scalars(
+            select(Todo).where(Todo.id.in_(changed_ids))
+        )
+        todos = {todo.id: todo for todo in todos}
 
-    return {'todos': todos.all()}
+    cursor = params.since
+    if changes:
+        cursor = encode_cursor({
+            'id': changes[-1].id,
+            'change_id': changes[-1].change_id,
+        })
+
+    return PydanticResponse(
+        TodoChangesSchema.model_validate(
+            {
+                'todos': [todos[id] for id in changed_ids if id in todos],
+                'deleted': [change.id for change in changes if change.deleted],
+                'next_cursor': cursor,
+                'has_more': len(changes) == params.limit,
+            },
+            from_attributes=True,
+        )
+    )
+
+
+@todos_router.get('/stats', response_model=TodoStatsSchema)
+async def get_todo_stats(
+    session: Session,
+    user: CurrentUser,
+    params: Annotated[TodoStatsParams, Query()],
+):
+    return TodoStatsSchema.model_validate(
+        await todo_stats(session, user.id, params.days), from_attributes=True
+    )
+
+
+@todos_router.get(
+    '/export',
+    response_class=StreamingResponse,
+    responses={
+        HTTPStatus.OK: {
+            'content': {
+                media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()
+            }
+        }
+    },
+)
+async def export_user_todos(
+    session: Session,
+    user: CurrentUser,
+    export_format: Annotated[ExportFormat, Query(alias='format')] = 'ndjson',
+):
+    return StreamingResponse(
+        export_todos(session, export_query(user.id), export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="todos.{export_format}"'
+            )
+        },
+    )
+
+
+@todos_router.post(
+    '/import',
+    status_code=HTTPStatus.CREATED,
+    response_model=TodoImportSchema,
+    openapi_extra={
+        'requestBody': {
+            'content': {
+                'application/x-ndjson': {},
+                'text/csv': {},
+            },
+        },
+    },
+)
+async def import_user_todos(
+    request: Request,
+    session: Session,
+    user: CurrentUser,
+    import_format: Annotated[ImportFormat, Query(alias='format')] = 'ndjson',
+):
+    return await import_todos(
+        session, user.id, request.stream(), import_format
+    )
 
 
 @todos_router.post(
@@ -66,13 +257,100 @@ async def create_todo(
     )
     session.add(db_todo)
     await session.commit()
-    await session.refresh(db_todo)
     return db_todo
 
 
-@todos_router.patch('/{todo_id}', response_model=TodoPublicSchema)
-async def patch_todo(
-    todo_id: int, session: Session, user: CurrentUser, todo: TodoUpdateSchema
+@todos_router.post(
+    '/bulk',
+    status_code=HTTPStatus.CREATED,
+    response_model=TodoBulkResponseSchema,
+)
+async def bulk_create_todos(
+    todos: BulkCreate, user: CurrentUser, session: Session
+):
+    db_todos = await session.scalars(
+        insert(Todo).returning(Todo, sort_by_parameter_order=True),
+        [{**todo.model_dump(), 'user_id': user.id} for todo in todos],
+    )
+    db_todos = db_todos.all()
+    await session.commit()
+
+    return {
+        'results': [
+            {'id': db_todo.id, 'status': 'created', 'todo': db_todo}
+            for db_todo in db_todos
+        ]
+    }
+
+
+@todos_router.patch('/bulk', response_model=TodoBulkResponseSchema)
+async def bulk_patch_todos(
+    todos: BulkUpdate, user: CurrentUser, session: Session
+):
+    owned_ids = set(
+        await session.scalars(
+            select(Todo.id).where(
+                Todo.user_id == user.id,
+                Todo.id.in_({todo.id for todo in todos}),
+            )
+        )
+    )
+
+    changes = [
+        todo.model_dump(exclude_unset=True) | {'id': todo.id}
+        for todo in todos
+        if todo.id in owned_ids
+    ]
+    changes = [change for change in changes if len(change) > 1]
+    changed_ids = {change['id'] for change in changes}
+    if changes:
+        await session.execute(update(Todo), changes)
+
+    db_todos = await session.scalars(
+        select(Todo)
+        .where(Todo.id.in_(owned_ids))
+        .execution_options(populate_existing=True)
+    )
+    db_todos = {db_todo.id: db_todo for db_todo in db_todos}
+    await session.commit()
+
+    return {
+        'results': [
+            {
+                'id': todo.id,
+                'status': 'updated' if todo.id in changed_ids else 'unchanged',
+                'todo': db_todos[todo.id],
+            }
+            if todo.id in db_todos
+            else {'id': todo.id, 'status': 'not_found'}
+            for todo in todos
+        ]
+    }
+
+
+@todos_router.delete('/bulk', response_model=TodoBulkResponseSchema)
+async def bulk_delete_todos(
+    todo_ids: BulkDelete, user: CurrentUser, session: Session
+):
+    deleted_ids = set(await delete_todos(session, user.id, todo_ids))
+    await session.commit()
+
+    return {
+        'results': [
+            {
+                'id': todo_id,
+                'status': 'deleted' if todo_id in deleted_ids else 'not_found',
+            }
+            for todo_id in todo_ids
+        ]
+    }
+
+
+@todos_router.get(
+    '/{todo_id}', response_model=TodoPublicSchema, responses=NOT_MODIFIED
+)
+async def read_todo(
+    todo_id: int, session: Session, user: CurrentUser, conditions: Conditions
 ):
     db_todo = await session.scalar(
         select(Todo).where(Todo.user_id == user.id, Todo.id == todo_id)
@@ -81,26 +359,75 @@ async def patch_todo(
     if not db_todo:
         raise TodoNotFoundException
 
-    for key, value in todo.model_dump(exclude_unset=True).items():
-        setattr(db_todo, key, value)
+    headers = {'ETag': todo_etag(db_todo)}
+    if not_modified(conditions, headers['ETag']):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    return PydanticResponse(
+        TodoPublicSchema.model_validate(db_todo, from_attributes=True),
+        headers=headers,
+    )
+
+
+@todos_router.patch(
+    '/{todo_id}',
+    response_model=TodoPublicSchema,
+    responses={
+        HTTPStatus.PRECONDITION_FAILED: {'description': 'Precondition Failed'}
+    },
+)
+async def patch_todo(
+    todo_id: int,
+    session: Session,
+    user: CurrentUser,
+    todo: TodoUpdateSchema,
+    preconditions: Annotated[PreconditionHeaders, Header()],
+):
+    query = update(Todo).where(Todo.user_id == user.id, Todo.id == todo_id)
+
+    if_match = preconditions.if_match
+    if if_match is not None and if_match.strip() != '*':
+        # The todo is only updated if it is still the version the client
+        # has, checked and written by a single statement.
+        versions = [
+            parse_todo_etag(etag.strip(), todo_id)
+            for etag in if_match.split(',')
+        ]
+        query = query.where(
+            Todo.version.in_([
+                version for version in versions if version is not None
+            ])
+        )
+
+    db_todo = await session.scalar(
+        query.values(**todo.model_dump(exclude_unset=True))
+        .returning(Todo)
+        .execution_options(populate_existing=True)
+    )
+
+    if not db_todo:
+        exists = if_match is not None and await session.scalar(
+            select(Todo.id).where(Todo.user_id == user.id, Todo.id == todo_id)
+        )
+        if exists:
+            raise TodoPreconditionFailedException
+        raise TodoNotFoundException
 
-    session.add(db_todo)
     await session.commit()
-    await session.refresh(db_todo)
 
-    return db_todo
+    return PydanticResponse(
+        TodoPublicSchema.model_validate(db_todo, from_attributes=True),
+        headers={'ETag': todo_etag(db_todo)},
+    )
 
 
 @todos_router.delete('/{todo_id}', response_model=Message)
 async def delete_todo(todo_id: int, session: Session, user: CurrentUser):
-    todo = await session.scalar(
-        select(Todo).where(Todo.user_id == user.id, Todo.id == todo_id)
-    )
+    deleted_ids = await delete_todos(session, user.id, [todo_id])
 
-    if not todo:
+    if not deleted_ids:
         raise TodoNotFoundException
 
-    await session.delete(todo)
     await session.commit()
 
     return {'message': 'Task has been deleted successfully'}
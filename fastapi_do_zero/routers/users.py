@@ -2,14 +2,24 @@ from http import HTTPStatus
 from logging import getLogger
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, Response
+from pydantic_core import to_json
+from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 
-from fastapi_do_zero.database import get_session
+from fastapi_do_zero.cache import create_cache
+from fastapi_do_zero.database import engine, get_session
 from fastapi_do_zero.exceptions.auth import PermissionException
-from fastapi_do_zero.models import User
+from fastapi_do_zero.models import Todo, User
+from fastapi_do_zero.pagination import next_cursor
+from fastapi_do_zero.responses import (
+    PydanticResponse,
+    etag_matches,
+    make_etag,
+)
 from fastapi_do_zero.schemas import (
     FilterParams,
     Message,
@@ -17,7 +27,12 @@ from fastapi_do_zero.schemas import (
     UserPublicSchema,
     UserSchema,
 )
-from fastapi_do_zero.security import get_current_user, get_password_hash
+from fastapi_do_zero.security import (
+    get_current_user,
+    get_password_hash_async,
+    invalidate_principal,
+)
+from fastapi_do_zero.settings import Settings
 
 users_router = APIRouter(prefix='/users', tags=['users'])
 
@@ -26,6 +41,54 @@ CurrentUser = Annotated[User, Depends(get_current_user)]
 
 logger = getLogger('uvicorn.error')
 
+settings = Settings()
+
+user_cache = create_cache(
+    settings.USER_CACHE_BACKEND,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    url=settings.USER_CACHE_URL,
+    prefix='users:',
+)
+
+
+async def purge_user(user_id: int, email: str, batch_size: int):
+    """
+    Delete a user's todos in small transactions, then the user itself.
+    Keeps locks short when an account has a very large history.
+
+    Runs after the response is sent, when the request's session is
+    already closed, so it uses its own.
+    """
+    async with AsyncSession(engine) as session:
+        while True:
+            batch = (
+                select(Todo.id)
+                .where(Todo.user_id == user_id)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = await session.execute(
+                delete(Todo)
+                .where(Todo.id.in_(batch))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+            if result.rowcount < batch_size:
+                break
+
+        await session.execute(
+            delete(User)
+            .where(User.id == user_id)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+    invalidate_principal(email)
+    await user_cache.delete(str(user_id))
+    logger.info(f'User {user_id} purged.')
+
 
 @users_router.post(
     '/', status_code=HTTPStatus.CREATED, response_model=UserPublicSchema
@@ -49,14 +112,13 @@ async def create_user(user: UserSchema, session: Session):
 
     db_user = User(
         username=user.username,
-        password=get_password_hash(user.password),
+        password=await get_password_hash_async(user.password),
         email=user.email,
     )
     session.add(db_user)
     await session.commit()
-    await session.refresh(db_user)
 
-    return db_user
+    return UserPublicSchema.model_validate(db_user)
 
 
 @users_router.get(
@@ -67,10 +129,27 @@ async def list_users(
     current_user: CurrentUser,
     filter_users: Annotated[FilterParams, Query()],
 ):
+    query = select(User)
+
+    if filter_users.after_id is not None:
+        query = query.where(User.id > filter_users.after_id)
+    else:
+        query = query.offset(filter_users.offset)
+
     users = await session.scalars(
-        select(User).offset(filter_users.offset).limit(filter_users.limit)
+        query.order_by(User.id).limit(filter_users.limit)
+    )
+    users = users.all()
+
+    return PydanticResponse(
+        UserListSchema.model_validate(
+            {
+                'users': users,
+                'next_cursor': next_cursor(users, filter_users.limit),
+            },
+            from_attributes=True,
+        )
     )
-    return {'users': users}
 
 
 @users_router.put(
@@ -87,13 +166,16 @@ async def update_user(
     if current_user.id != user_id:
         raise PermissionException
 
+    previous_email = current_user.email
+
     try:
         current_user.username = user.username
-        current_user.password = get_password_hash(user.password)
+        current_user.password = await get_password_hash_async(user.password)
         current_user.email = user.email
         await session.commit()
-        await session.refresh(current_user)
-        return current_user
+        invalidate_principal(previous_email, current_user.email)
+        await user_cache.delete(str(user_id))
+        return UserPublicSchema.model_validate(current_user)
     except IntegrityError:
         logger.warning(
             f'Update failed for user {user_id} '
@@ -109,17 +191,35 @@ async def update_user(
     '/{user_id}',
     status_code=HTTPStatus.OK,
     response_model=Message,
+    responses={HTTPStatus.ACCEPTED: {'model': Message}},
 )
 async def delete_user(
     user_id: int,
     session: Session,
     current_user: CurrentUser,
+    background: bool = False,
 ):
     if current_user.id != user_id:
         raise PermissionException
 
+    if background:
+        invalidate_principal(current_user.email)
+        await user_cache.delete(str(user_id))
+        return JSONResponse(
+            status_code=HTTPStatus.ACCEPTED,
+            content={'message': 'User deletion scheduled'},
+            background=BackgroundTask(
+                purge_user,
+                user_id,
+                current_user.email,
+                settings.USER_PURGE_BATCH_SIZE,
+            ),
+        )
+
     await session.delete(current_user)
     await session.commit()
+    invalidate_principal(current_user.email)
+    await user_cache.delete(str(user_id))
 
     return Message(message='User deleted successfully')
 
@@ -128,14 +228,33 @@ async def delete_user(
     '/{user_id}',
     status_code=HTTPStatus.OK,
     response_model=UserPublicSchema,
+    responses={HTTPStatus.NOT_MODIFIED: {'description': 'Not Modified'}},
 )
-async def read_user(user_id: int, session: Session):
-    db_user = await session.scalar(select(User).where(User.id == user_id))
+async def read_user(
+    user_id: int,
+    session: Session,
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    body = await user_cache.get(str(user_id))
 
-    if not db_user:
-        logger.warning(f'User with id {user_id} not found.')
-        raise HTTPException(
-            status_code=HTTPStatus.NOT_FOUND, detail='User not found'
+    if body is None:
+        db_user = await session.scalar(select(User).where(User.id == user_id))
+
+        if not db_user:
+            logger.warning(f'User with id {user_id} not found.')
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND, detail='User not found'
+            )
+
+        body = to_json(UserPublicSchema.model_validate(db_user))
+        await user_cache.set(str(user_id), body)
+
+    etag = make_etag(body)
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag}
         )
 
-    return db_user
+    return Response(
+        body, media_type='application/json', headers={'ETag': etag}
+    )
@@ -1,8 +1,17 @@
-from datetime import datetime
-
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from datetime import date, datetime
+from typing import Literal
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    EmailStr,
+    Field,
+    field_validator,
+    model_validator,
+)
 
 from fastapi_do_zero.models import TodoState
+from fastapi_do_zero.pagination import decode_cursor
 
 
 class Message(BaseModel):
@@ -24,6 +33,7 @@ class UserPublicSchema(BaseModel):
 
 class UserListSchema(BaseModel):
     users: list[UserPublicSchema]
+    next_cursor: str | None = None
 
 
 class JWTToken(BaseModel):
@@ -34,6 +44,26 @@ class JWTToken(BaseModel):
 class FilterParams(BaseModel):
     offset: int = Field(ge=0, default=0)
     limit: int = Field(ge=0, default=100)
+    cursor: str | None = None
+
+    @field_validator('cursor')
+    @classmethod
+    def validate_cursor(cls, cursor: str | None) -> str | None:
+        if cursor is not None:
+            decode_cursor(cursor)
+        return cursor
+
+    @model_validator(mode='after')
+    def check_offset_or_cursor(self):
+        if self.cursor and self.offset:
+            raise ValueError('Use either offset or cursor, not both')
+        return self
+
+    @property
+    def after_id(self) -> int | None:
+        if self.cursor is None:
+            return None
+        return decode_cursor(self.cursor)['id']
 
 
 class TodoSchema(BaseModel):
@@ -50,6 +80,7 @@ class TodoPublicSchema(TodoSchema):
 
 class TodoListSchema(BaseModel):
     todos: list[TodoPublicSchema]
+    next_cursor: str | None = None
 
 
 class TodoUpdateSchema(BaseModel):
@@ -58,7 +89,102 @@ class TodoUpdateSchema(BaseModel):
     state: TodoState | None = None
 
 
+BULK_MAX_ITEMS = 500
+
+
+class TodoBulkUpdateSchema(TodoUpdateSchema):
+    id: int
+
+    @field_validator('title', 'description', 'state')
+    @classmethod
+    def validate_not_null(cls, value):
+        # Leave a field out to keep it; null would fail the whole batch
+        # at the database.
+        if value is None:
+            raise ValueError('Field can not be null')
+        return value
+
+
+class TodoBulkResultSchema(BaseModel):
+    id: int
+    status: Literal['created', 'updated', 'unchanged', 'deleted', 'not_found']
+    todo: TodoPublicSchema | None = None
+
+
+class TodoBulkResponseSchema(BaseModel):
+    results: list[TodoBulkResultSchema]
+
+
+class TodoImportErrorSchema(BaseModel):
+    row: int
+    detail: str
+
+
+class TodoImportSchema(BaseModel):
+    imported: int
+    failed: int
+    errors: list[TodoImportErrorSchema]
+
+
+class TodoDailyCountSchema(BaseModel):
+    day: date
+    created: int
+
+
+class TodoStatsSchema(BaseModel):
+    total: int
+    states: dict[TodoState, int]
+    created_per_day: list[TodoDailyCountSchema]
+
+
+class TodoStatsParams(BaseModel):
+    days: int = Field(ge=1, le=366, default=30)
+
+
+class ConditionalHeaders(BaseModel):
+    if_none_match: str | None = None
+
+
+class PreconditionHeaders(BaseModel):
+    if_match: str | None = None
+
+
 class FilterTodoParams(FilterParams):
     title: str | None = Field(None, min_length=3, max_length=20)
     description: str | None = Field(None, min_length=3, max_length=20)
     state: TodoState | None = None
+    q: str | None = Field(None, min_length=1, max_length=100)
+
+    @model_validator(mode='after')
+    def check_search_without_cursor(self):
+        if self.q and self.cursor:
+            raise ValueError('Search results are paginated with offset')
+        return self
+
+
+class TodoChangesParams(BaseModel):
+    since: str | None = None
+    limit: int = Field(ge=1, le=1000, default=100)
+
+    @field_validator('since')
+    @classmethod
+    def validate_since(cls, since: str | None) -> str | None:
+        if since is not None:
+            payload = decode_cursor(since)
+            if not isinstance(payload.get('change_id'), int):
+                raise ValueError('Invalid cursor')
+        return since
+
+    @property
+    def position(self) -> tuple[int, int] | None:
+        if self.since is None:
+            return None
+        payload = decode_cursor(self.since)
+        return payload['change_id'], payload['id']
+
+
+class TodoChangesSchema(BaseModel):
+    todos: list[TodoPublicSchema]
+    deleted: list[int]
+    next_cursor: str | None = None
+    has_more: bool
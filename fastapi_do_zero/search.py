@@ -0,0 +1,59 @@
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    column,
+    func,
+    literal_column,
+    or_,
+    table,
+)
+
+from fastapi_do_zero.models import Todo
+
+# Rendered inline (not as a bound parameter) so queries use exactly the
+# same expression as the `ix_todos_search` index declared on Todo.
+SEARCH_CONFIG = literal_column("'simple'")
+
+todos_fts = table('todos_fts', column('rowid'))
+
+
+def todo_search_vector() -> ColumnElement:
+    """
+    The PostgreSQL tsvector of a todo, matching the `ix_todos_search` index.
+    """
+    return func.to_tsvector(
+        SEARCH_CONFIG, Todo.title + literal_column("' '") + Todo.description
+    )
+
+
+def fts5_query(terms: str) -> str:
+    """
+    Quote every term so user input is never parsed as FTS5 syntax.
+    """
+    return ' '.join(
+        '"{}"'.format(term.replace('"', '""')) for term in terms.split()
+    )
+
+
+def search_todos(query: Select, terms: str, dialect: str) -> Select:
+    """
+    Restrict `query` to todos matching `terms`, best matches first.
+    """
+    if dialect == 'postgresql':
+        vector = todo_search_vector()
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, terms)
+        return query.where(vector.op('@@')(tsquery)).order_by(
+            func.ts_rank(vector, tsquery).desc()
+        )
+
+    if dialect == 'sqlite':
+        match = literal_column('todos_fts')
+        return (
+            query.join(todos_fts, todos_fts.c.rowid == Todo.id)
+            .where(match.op('MATCH')(fts5_query(terms)))
+            .order_by(func.bm25(match))
+        )
+
+    return query.where(
+        or_(Todo.title.contains(terms), Todo.description.contains(terms))
+    )
@@ -4,22 +4,66 @@ from zoneinfo import ZoneInfo
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
 from jwt import DecodeError, ExpiredSignatureError, decode, encode
+from prometheus_client import REGISTRY
 from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
+from fastapi_do_zero.cache import TTLCache
 from fastapi_do_zero.database import get_session
 from fastapi_do_zero.exceptions.auth import CredentialsException
+from fastapi_do_zero.hashing import HashingPool
+from fastapi_do_zero.metrics import (
+    JWT_DECODE_FAILURES,
+    CacheCollector,
+    HashingPoolCollector,
+)
 from fastapi_do_zero.models import User
 from fastapi_do_zero.settings import Settings
+from fastapi_do_zero.telemetry import timed
+
 
-pwd_context = PasswordHash.recommended()
+def password_context(
+    time_cost: int, memory_cost: int, parallelism: int
+) -> PasswordHash:
+    """
+    Argon2id hashing with the given costs; `memory_cost` is in KiB.
+    """
+    return PasswordHash((
+        Argon2Hasher(
+            time_cost=time_cost,
+            memory_cost=memory_cost,
+            parallelism=parallelism,
+        ),
+    ))
+
+
+settings = Settings()
+
+pwd_context = password_context(
+    settings.ARGON2_TIME_COST,
+    settings.ARGON2_MEMORY_COST,
+    settings.ARGON2_PARALLELISM,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl='/auth/token', refreshUrl='/auth/refresh'
 )
 
-settings = Settings()
+password_hasher = HashingPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+)
+REGISTRY.register(HashingPoolCollector('password_hash_pool', password_hasher))
+
+principal_cache = TTLCache(
+    max_size=settings.AUTH_CACHE_MAX_SIZE,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS,
+)
+REGISTRY.register(CacheCollector('auth_principal_cache', principal_cache))
 
 
 def get_password_hash(password: str) -> str:
@@ -36,6 +80,36 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Whether a hash was made with other parameters than the current ones.
+    """
+    hasher = pwd_context.current_hasher
+    if not hasher.identify(hashed_password):
+        return True
+    return hasher.check_needs_rehash(hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password in the hashing pool, without blocking the event loop.
+    """
+    with timed('hash'):
+        return await password_hasher.run(get_password_hash, password)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> bool:
+    """
+    Verify a password in the hashing pool, without blocking the event loop.
+    """
+    with timed('hash'):
+        return await password_hasher.run(
+            verify_password, plain_password, hashed_password
+        )
+
+
 def create_access_token(data: dict) -> str:
     """
     Create a JWT access token with the given data.
@@ -53,6 +127,54 @@ def create_access_token(data: dict) -> str:
     return encoded_jwt
 
 
+def cache_principal(user: User):
+    """
+    Store the column values of an authenticated user, keyed by email.
+    """
+    principal_cache.set(
+        user.email,
+        {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'password': user.password,
+            'created_at': user.created_at,
+            'updated_at': user.updated_at,
+        },
+    )
+
+
+def invalidate_principal(*emails: str):
+    """
+    Drop cached principals. Must be called whenever a user changes.
+    """
+    for email in emails:
+        principal_cache.delete(email)
+
+
+async def get_cached_principal(
+    session: AsyncSession, subject_email: str
+) -> User | None:
+    """
+    Rebuild a cached user and attach it to the session without a query.
+    """
+    data = principal_cache.get(subject_email)
+    if data is None:
+        return None
+
+    user = User(
+        username=data['username'],
+        email=data['email'],
+        password=data['password'],
+    )
+    user.id = data['id']
+    user.created_at = data['created_at']
+    user.updated_at = data['updated_at']
+    make_transient_to_detached(user)
+
+    return await session.merge(user, load=False)
+
+
 async def get_current_user(
     session: AsyncSession = Depends(get_session),
     token: str = Depends(oauth2_scheme),
@@ -60,23 +182,33 @@ async def get_current_user(
     """
     Decode the JWT token and return the user data.
     """
-    try:
-        payload = decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
+    with timed('auth'):
+        try:
+            payload = decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+        except DecodeError:
+            JWT_DECODE_FAILURES.labels('invalid').inc()
+            raise CredentialsException
+        except ExpiredSignatureError:
+            JWT_DECODE_FAILURES.labels('expired').inc()
+            raise CredentialsException
+
         subject_email = payload.get('sub')
         if not subject_email:
+            JWT_DECODE_FAILURES.labels('missing_subject').inc()
             raise CredentialsException
-    except DecodeError:
-        raise CredentialsException
-    except ExpiredSignatureError:
-        raise CredentialsException
 
-    user = await session.scalar(
-        select(User).where(User.email == subject_email)
-    )
+        user = await get_cached_principal(session, subject_email)
+        if user:
+            return user
 
-    if not user:
-        raise CredentialsException
+        user = await session.scalar(
+            select(User).where(User.email == subject_email)
+        )
+
+        if not user:
+            raise CredentialsException
 
-    return user
+        cache_principal(user)
+        return user
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,6 +9,67 @@ class Settings(BaseSettings):
     )
 
     DATABASE_URL: str
+    # Per worker: 4 uvicorn workers x (5 + 5) stays well below the default
+    # max_connections of 100 on PostgreSQL.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_WARMUP: int = 2
+    DB_STATEMENT_TIMEOUT_MS: int = 30_000
+    # Transaction-pooling pgbouncer can't use server-side prepared
+    # statements or per-connection startup options: the statement timeout
+    # is then set with SET LOCAL at the start of each transaction.
+    DB_PGBOUNCER: bool = False
+
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     SECRET_KEY: str
     ALGORITHM: str
+
+    # Argon2id costs, argon2-cffi's defaults. `python -m benchmarks.security`
+    # recommends values for a target login latency on this machine.
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_EXECUTOR: Literal['thread', 'process'] = 'thread'
+
+    AUTH_CACHE_MAX_SIZE: int = 1024
+    AUTH_CACHE_TTL_SECONDS: float = 60
+
+    USER_PURGE_BATCH_SIZE: int = 1000
+
+    # GET /users/{id}. `redis` shares the cache, and its invalidations,
+    # between workers; it needs the redis package.
+    USER_CACHE_BACKEND: Literal['memory', 'redis'] = 'memory'
+    USER_CACHE_URL: str = 'redis://localhost:6379/0'
+    USER_CACHE_MAX_SIZE: int = 10_000
+    USER_CACHE_TTL_SECONDS: float = 30
+
+    # Opt-in per phase timings (auth, db, hash, serialize) in a
+    # Server-Timing header. Requests slower than SLOW_REQUEST_MS, or
+    # running more than SLOW_REQUEST_STATEMENTS statements, are logged;
+    # 0 turns them off.
+    SERVER_TIMING_ENABLED: bool = False
+    SLOW_REQUEST_MS: float = 0
+    SLOW_REQUEST_STATEMENTS: int = 0
+
+    # Statements slower than SLOW_QUERY_MS are logged to SLOW_QUERY_LOG_FILE,
+    # 0 turns it off. On PostgreSQL SLOW_QUERY_EXPLAIN_RATE of the slow
+    # SELECTs are run again with EXPLAIN (ANALYZE, BUFFERS).
+    SLOW_QUERY_MS: float = 0
+    SLOW_QUERY_EXPLAIN_RATE: float = 0.1
+    SLOW_QUERY_LOG_FILE: str = 'slow_queries.log'
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUP_COUNT: int = 5
+
+    # Requests sending `X-Profile: <PROFILING_TOKEN>` are profiled and
+    # their flamegraph stacks written to PROFILING_OUTPUT_DIR.
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ''
+    PROFILING_OUTPUT_DIR: str = 'profiles'
+    PROFILING_INTERVAL_MS: float = 1
+    PROFILING_MAX_PER_MINUTE: int = 6
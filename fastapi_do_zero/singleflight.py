@@ -0,0 +1,65 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import asdict, dataclass
+from typing import TypeVar
+
+T = TypeVar('T')
+
+
+@dataclass
+class SingleFlightStats:
+    executed: int = 0
+    collapsed: int = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function, callers arriving while
+    it is in flight wait for it and get the same result, or exception.
+    Once it finishes the key is forgotten, so the next call runs again:
+    nothing is cached. Results are shared, so they should be immutable.
+    """
+
+    def __init__(self):
+        self.stats = SingleFlightStats()
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        while (call := self._calls.get(key)) is not None:
+            try:
+                result = await asyncio.shield(call)
+            except asyncio.CancelledError:
+                if not call.cancelled():
+                    raise
+                # The caller running it was cancelled, try again.
+                continue
+            self.stats.collapsed += 1
+            return result
+
+        call = asyncio.get_running_loop().create_future()
+        self._calls[key] = call
+        self.stats.executed += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        except Exception as error:
+            call.set_exception(error)
+            # Marks it as retrieved when nobody else was waiting.
+            call.exception()
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def snapshot(self) -> dict:
+        return {**asdict(self.stats), 'in_flight': self.in_flight}
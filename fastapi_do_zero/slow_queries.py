@@ -0,0 +1,195 @@
+import asyncio
+import json
+import logging
+import queue
+import random
+import re
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from fastapi_do_zero.settings import Settings
+from fastapi_do_zero.telemetry import request_stats, route_name
+
+# Skips the recorder, set on the EXPLAIN connections.
+SKIP_OPTION = 'skip_slow_query_log'
+
+PLACEHOLDER = r'(?:%\(\w+\)s|%s|\?|\$\d+|:\w+)'
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_LISTS = re.compile(
+    rf'\(\s*{PLACEHOLDER}(?:\s*,\s*{PLACEHOLDER})+\s*\)'
+)
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    The statement without literals, whitespace runs or variable length
+    IN lists, so the same query always reads the same.
+    """
+    statement = WHITESPACE.sub(' ', statement).strip()
+    statement = LITERALS.sub('?', statement)
+    return PLACEHOLDER_LISTS.sub('(...)', statement)
+
+
+def parameters_shape(parameters, executemany: bool = False):
+    """
+    The names and types of the bind parameters, never their values.
+    """
+    if executemany:
+        rows = list(parameters)
+        return {
+            'rows': len(rows),
+            'row': parameters_shape(rows[0]) if rows else None,
+        }
+    if isinstance(parameters, dict):
+        return {
+            name: type(value).__name__ for name, value in parameters.items()
+        }
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def is_explainable(statement: str) -> bool:
+    """
+    EXPLAIN ANALYZE runs the statement, so only plain reads are explained.
+    """
+    statement = statement.lstrip().upper()
+    return statement.startswith('SELECT') and not re.search(
+        r'\bFOR (UPDATE|NO KEY UPDATE|SHARE|KEY SHARE)\b', statement
+    )
+
+
+class SlowQueryLog:
+    """
+    Record statements slower than `threshold_ms` as JSON lines in a
+    rotating file.
+
+    On PostgreSQL a `explain_rate` share of the slow SELECTs is run again
+    with EXPLAIN (ANALYZE, BUFFERS) by a background task, on its own
+    connection, and its plan is added to the record. At most one plan is
+    captured at a time, slow queries arriving meanwhile are logged
+    without one. Records go through a queue, so the request never waits
+    on the file.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        handler: logging.Handler,
+        explain_rate: float = 0.0,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_rate = explain_rate
+        self.engine: AsyncEngine | None = None
+        self._explaining = False
+        self._tasks: set[asyncio.Task] = set()
+
+        self.logger = logging.getLogger('fastapi_do_zero.slow_queries')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        records = queue.SimpleQueue()
+        self._queue_handler = QueueHandler(records)
+        self.logger.addHandler(self._queue_handler)
+        self.listener = QueueListener(records, handler)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> 'SlowQueryLog':
+        handler = RotatingFileHandler(
+            settings.SLOW_QUERY_LOG_FILE,
+            maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+            backupCount=settings.SLOW_QUERY_LOG_BACKUP_COUNT,
+            delay=True,
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        return cls(
+            settings.SLOW_QUERY_MS,
+            handler,
+            explain_rate=settings.SLOW_QUERY_EXPLAIN_RATE,
+        )
+
+    def instrument(self, db_engine: AsyncEngine):
+        self.engine = db_engine
+        event.listen(
+            db_engine.sync_engine, 'before_cursor_execute', self.before
+        )
+        event.listen(db_engine.sync_engine, 'after_cursor_execute', self.after)
+
+    def start(self):
+        self.listener.start()
+
+    def stop(self):
+        self.listener.stop()
+        self.logger.removeHandler(self._queue_handler)
+        self.listener.handlers[0].close()
+
+    @staticmethod
+    def before(conn, cursor, statement, *args):
+        conn.info.setdefault('slow_query_start', []).append(
+            time.perf_counter()
+        )
+
+    def after(self, conn, cursor, statement, parameters, *args):
+        context, executemany = args
+        if not conn.info.get('slow_query_start'):
+            return
+        duration_ms = (
+            time.perf_counter() - conn.info['slow_query_start'].pop()
+        ) * 1000
+        if duration_ms < self.threshold_ms:
+            return
+        if context is not None and context.execution_options.get(SKIP_OPTION):
+            return
+
+        stats = request_stats.get()
+        record = {
+            'event': 'slow_query',
+            'duration_ms': round(duration_ms, 2),
+            'sql': normalize_sql(statement),
+            'parameters': parameters_shape(parameters, executemany),
+            'route': route_name(stats.scope) if stats else None,
+        }
+
+        if self.should_explain(conn, statement, executemany):
+            self._explaining = True
+            task = asyncio.get_running_loop().create_task(
+                self.explain(record, statement, parameters)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            return
+
+        self.write(record)
+
+    def should_explain(self, conn, statement: str, executemany: bool):
+        return (
+            self.engine is not None
+            and conn.dialect.name == 'postgresql'
+            and not executemany
+            and not self._explaining
+            and is_explainable(statement)
+            and random.random() < self.explain_rate
+        )
+
+    async def explain(self, record: dict, statement: str, parameters):
+        try:
+            async with self.engine.connect() as connection:
+                await connection.execution_options(**{SKIP_OPTION: True})
+                plan = await connection.exec_driver_sql(
+                    f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}',
+                    parameters,
+                )
+                record['plan'] = plan.scalar()
+                # Nothing it ran is kept.
+                await connection.rollback()
+        except Exception as error:
+            record['plan_error'] = str(error)
+        finally:
+            self._explaining = False
+            self.write(record)
+
+    def write(self, record: dict):
+        self.logger.info(json.dumps(record, default=str))
@@ -0,0 +1,35 @@
+from datetime import date, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi_do_zero.models import TodoDailyCount, TodoState, TodoStateCount
+
+
+async def todo_stats(session: AsyncSession, user_id: int, days: int) -> dict:
+    """
+    Todo counts of `user_id` per state, and created per day over the last
+    `days` days, read from the counters tables.
+    """
+    states = dict.fromkeys(TodoState, 0)
+    counts = await session.execute(
+        select(TodoStateCount.state, TodoStateCount.count).where(
+            TodoStateCount.user_id == user_id
+        )
+    )
+    states.update(counts.tuples().all())
+
+    daily = await session.scalars(
+        select(TodoDailyCount)
+        .where(
+            TodoDailyCount.user_id == user_id,
+            TodoDailyCount.day > date.today() - timedelta(days=days),
+        )
+        .order_by(TodoDailyCount.day)
+    )
+
+    return {
+        'total': sum(states.values()),
+        'states': states,
+        'created_per_day': daily.all(),
+    }
@@ -0,0 +1,108 @@
+from collections.abc import Iterable
+
+from sqlalchemy import (
+    Select,
+    delete,
+    false,
+    insert,
+    literal,
+    select,
+    true,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi_do_zero.models import ChangeHorizon, Todo, TodoTombstone
+
+
+async def delete_todos(
+    session: AsyncSession, user_id: int, todo_ids: Iterable[int]
+) -> list[int]:
+    """
+    Delete the todos of `user_id` among `todo_ids`, leaving a tombstone
+    for each one. Returns the ids actually deleted.
+    """
+    deleted = (
+        delete(Todo)
+        .where(Todo.user_id == user_id, Todo.id.in_(set(todo_ids)))
+        .returning(Todo.id, Todo.user_id)
+    )
+
+    if session.get_bind().dialect.name == 'postgresql':
+        # Both writes in a single statement.
+        deleted = deleted.cte('deleted')
+        tombstones = await session.scalars(
+            insert(TodoTombstone)
+            .from_select(
+                ['todo_id', 'user_id'],
+                select(deleted.c.id, deleted.c.user_id),
+            )
+            .returning(TodoTombstone.todo_id)
+        )
+        return list(tombstones)
+
+    deleted_ids = list(await session.scalars(deleted))
+    if deleted_ids:
+        await session.execute(
+            insert(TodoTombstone),
+            [{'todo_id': id, 'user_id': user_id} for id in deleted_ids],
+        )
+    return deleted_ids
+
+
+def todo_changes(
+    user_id: int, since: tuple[int, int] | None, limit: int
+) -> Select:
+    """
+    Ids of the todos of `user_id` changed after the `(change_id, id)`
+    position `since`, oldest first, flagged when the todo was deleted.
+
+    Without `since` every existing todo is a change, and tombstones are
+    left out: there is nothing on the client to delete yet.
+    """
+    # Changes from transactions still in progress are held back, with any
+    # change after them: once they commit, their changes would sort
+    # before the cursor and never be returned.
+    changed = select(
+        Todo.id.label('id'),
+        Todo.change_id.label('change_id'),
+        false().label('deleted'),
+    ).where(Todo.user_id == user_id, Todo.change_id < ChangeHorizon())
+
+    if since is None:
+        return changed.order_by(Todo.change_id, Todo.id).limit(limit)
+
+    change_id, last_id = since
+    position = tuple_(literal(change_id), literal(last_id))
+    deleted = select(
+        TodoTombstone.todo_id.label('id'),
+        TodoTombstone.change_id.label('change_id'),
+        true().label('deleted'),
+    ).where(
+        TodoTombstone.user_id == user_id,
+        TodoTombstone.change_id < ChangeHorizon(),
+    )
+
+    # Each side is cut to `limit` along its own index before merging.
+    changed = (
+        changed.where(tuple_(Todo.change_id, Todo.id) > position)
+        .order_by(Todo.change_id, Todo.id)
+        .limit(limit)
+        .subquery()
+    )
+    deleted = (
+        deleted.where(
+            tuple_(TodoTombstone.change_id, TodoTombstone.todo_id) > position
+        )
+        .order_by(TodoTombstone.change_id, TodoTombstone.todo_id)
+        .limit(limit)
+        .subquery()
+    )
+    changes = union_all(select(changed), select(deleted)).subquery()
+
+    return (
+        select(changes)
+        .order_by(changes.c.change_id, changes.c.id)
+        .limit(limit)
+    )
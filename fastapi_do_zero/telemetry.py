@@ -0,0 +1,213 @@
+import json
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from logging import getLogger
+
+from sqlalchemy import QueuePool, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from fastapi_do_zero.metrics import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_STATEMENTS_PER_REQUEST,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_PROGRESS,
+)
+
+logger = getLogger('uvicorn.error')
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+@dataclass
+class RequestStats:
+    statements: int = 0
+    rows: int = 0
+    # Seconds spent per phase: auth, db, hash and serialize. Phases may
+    # overlap, auth includes the query loading the user.
+    phases: dict[str, float] = field(default_factory=dict)
+    scope: Scope = field(default_factory=dict, repr=False)
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+# Set by `MetricsMiddleware` for the request being handled. SQLAlchemy's
+# async engine runs its events in the request's task, so they see it.
+request_stats: ContextVar[RequestStats | None] = ContextVar(
+    'request_stats', default=None
+)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """
+    Add the time spent in the block to `phase` of the current request.
+    """
+    stats = request_stats.get()
+    if stats is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add(phase, time.perf_counter() - start)
+
+
+def before_statement(conn, cursor, statement, *args):
+    stats = request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        conn.info.setdefault('statement_start', []).append(time.perf_counter())
+
+
+def after_statement(conn, cursor, statement, *args):
+    stats = request_stats.get()
+    if stats is not None and conn.info.get('statement_start'):
+        stats.add(
+            'db', time.perf_counter() - conn.info['statement_start'].pop()
+        )
+        # Rows written, or returned where the driver reports it.
+        stats.rows += max(cursor.rowcount, 0)
+
+
+def instrument_engine(db_engine: AsyncEngine):
+    """
+    Account the statements of each request and expose the pool gauges.
+    """
+    event.listen(
+        db_engine.sync_engine, 'before_cursor_execute', before_statement
+    )
+    event.listen(
+        db_engine.sync_engine, 'after_cursor_execute', after_statement
+    )
+
+    pool = db_engine.pool
+    if isinstance(pool, QueuePool):
+        DB_POOL_SIZE.set_function(pool.size)
+        DB_POOL_CHECKED_OUT.set_function(pool.checkedout)
+        DB_POOL_OVERFLOW.set_function(pool.overflow)
+
+
+def route_name(scope: Scope) -> str:
+    """
+    The path template of the matched route, which keeps the number of
+    label values bounded.
+    """
+    route = scope.get('route')
+    return getattr(route, 'path', UNMATCHED_ROUTE)
+
+
+def server_timing(stats: RequestStats, total: float) -> str:
+    metrics = [
+        f'{phase};dur={seconds * 1000:.2f}'
+        for phase, seconds in stats.phases.items()
+    ]
+    metrics.append(f'app;dur={total * 1000:.2f}')
+    return ', '.join(metrics)
+
+
+class MetricsMiddleware:
+    """
+    Record the latency, status and SQL statements of every HTTP request.
+
+    A plain ASGI middleware: unlike `BaseHTTPMiddleware` it adds no task
+    or stream per request, and it doesn't buffer streaming responses.
+
+    With `server_timing` the time spent per phase is sent in a
+    `Server-Timing` header. Requests slower than `slow_request_ms`, or
+    running more than `slow_request_statements` statements, are logged;
+    zero turns either threshold off.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        server_timing: bool = False,
+        slow_request_ms: float = 0,
+        slow_request_statements: int = 0,
+    ):
+        self.app = app
+        self.server_timing = server_timing
+        self.slow_request_ms = slow_request_ms
+        self.slow_request_statements = slow_request_statements
+
+    def is_slow(self, duration: float, stats: RequestStats) -> bool:
+        return (
+            0 < self.slow_request_ms <= duration * 1000
+            or 0 < self.slow_request_statements <= stats.statements
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status = 500
+        stats = RequestStats(scope=scope)
+        token = request_stats.set(stats)
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if self.server_timing:
+                    MutableHeaders(scope=message).append(
+                        'Server-Timing',
+                        server_timing(stats, time.perf_counter() - start),
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            in_progress.dec()
+            request_stats.reset(token)
+
+            route = route_name(scope)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            HTTP_REQUEST_DURATION.labels(method, route).observe(duration)
+            DB_STATEMENTS_PER_REQUEST.labels(route).observe(stats.statements)
+
+            if self.is_slow(duration, stats):
+                log_slow_request(scope, route, status, duration, stats)
+
+
+def log_slow_request(
+    scope: Scope,
+    route: str,
+    status: int,
+    duration: float,
+    stats: RequestStats,
+):
+    record = {
+        'event': 'slow_request',
+        'method': scope['method'],
+        'route': route,
+        'path': scope['path'],
+        'status': status,
+        'duration_ms': round(duration * 1000, 2),
+        'statements': stats.statements,
+        'rows': stats.rows,
+        'phases_ms': {
+            phase: round(seconds * 1000, 2)
+            for phase, seconds in stats.phases.items()
+        },
+    }
+    logger.warning(
+        f'Slow request: {json.dumps(record)}', extra={'slow_request': record}
+    )
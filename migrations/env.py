@@ -32,8 +32,28 @@ target_metadata = table_registry.metadata
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
+# Expression and operator-class indexes, and the SQLite FTS5 shadow
+# tables, are written by hand in the migrations, autogenerate can't
+# compare them reliably.
+MANUAL_INDEXES = {
+    'ix_todos_search',
+    'ix_todos_title_trgm',
+    'ix_todos_description_trgm',
+}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table' and name.startswith('todos_fts'):
+        return False
+    return not (type_ == 'index' and name in MANUAL_INDEXES)
+
+
 def do_run_migrations(connection):
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -68,6 +88,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
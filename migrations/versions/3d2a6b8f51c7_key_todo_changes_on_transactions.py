@@ -0,0 +1,111 @@
+"""key todo changes on transactions
+
+Revision ID: 3d2a6b8f51c7
+Revises: 9e1f4c27a0b3
+Create Date: 2025-07-30 09:41:07.552184
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d2a6b8f51c7'
+down_revision: Union[str, Sequence[str], None] = '9e1f4c27a0b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same as fastapi_do_zero.models.ChangeId
+CHANGE_ID = 'CAST(CAST(pg_current_xact_id() AS TEXT) AS BIGINT)'
+
+# GET /todos/changes: WHERE user_id = ? AND (change_id, id) > (?, ?)
+CHANGE_ID_INDEX = 'ix_todos_user_id_change_id_id'
+UPDATED_AT_INDEX = 'ix_todos_user_id_updated_at_id'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+
+    # Existing rows sort before any new change. A constant default
+    # doesn't rewrite the tables; SQLite can't add a column with an
+    # expression as default, the application sets it there.
+    for table in ('todos', 'todo_tombstones'):
+        op.add_column(
+            table,
+            sa.Column(
+                'change_id', sa.BigInteger(), server_default=sa.text('0'),
+                nullable=False,
+            ),
+        )
+        if postgresql:
+            op.alter_column(
+                table, 'change_id', server_default=sa.text(CHANGE_ID)
+            )
+
+    op.drop_index(
+        'ix_todo_tombstones_user_id_deleted_at', table_name='todo_tombstones'
+    )
+    op.create_index(
+        'ix_todo_tombstones_user_id_change_id',
+        'todo_tombstones',
+        ['user_id', 'change_id', 'todo_id'],
+    )
+
+    if postgresql:
+        # Same as 5fdd9e7dc507, don't block writes to todos.
+        with op.get_context().autocommit_block():
+            op.create_index(
+                CHANGE_ID_INDEX,
+                'todos',
+                ['user_id', 'change_id', 'id'],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(
+                UPDATED_AT_INDEX,
+                table_name='todos',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    else:
+        op.create_index(CHANGE_ID_INDEX, 'todos', ['user_id', 'change_id', 'id'])
+        op.drop_index(UPDATED_AT_INDEX, table_name='todos')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index(
+                UPDATED_AT_INDEX,
+                'todos',
+                ['user_id', 'updated_at', 'id'],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(
+                CHANGE_ID_INDEX,
+                table_name='todos',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    else:
+        op.create_index(
+            UPDATED_AT_INDEX, 'todos', ['user_id', 'updated_at', 'id']
+        )
+        op.drop_index(CHANGE_ID_INDEX, table_name='todos')
+
+    op.drop_index(
+        'ix_todo_tombstones_user_id_change_id', table_name='todo_tombstones'
+    )
+    op.create_index(
+        'ix_todo_tombstones_user_id_deleted_at',
+        'todo_tombstones',
+        ['user_id', 'deleted_at', 'todo_id'],
+    )
+
+    for table in ('todos', 'todo_tombstones'):
+        op.drop_column(table, 'change_id')
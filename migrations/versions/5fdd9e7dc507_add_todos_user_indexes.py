@@ -0,0 +1,59 @@
+"""add todos user indexes
+
+Revision ID: 5fdd9e7dc507
+Revises: 643bfc490591
+Create Date: 2025-07-21 09:41:03.774512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5fdd9e7dc507'
+down_revision: Union[str, Sequence[str], None] = '643bfc490591'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    # GET /todos, PATCH/DELETE /todos/{id}: WHERE user_id = ? ORDER BY id
+    'ix_todos_user_id_id': ['user_id', 'id'],
+    # GET /todos?state=...: WHERE user_id = ? AND state = ? ORDER BY id
+    'ix_todos_user_id_state_id': ['user_id', 'state', 'id'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        # CONCURRENTLY can't run inside a transaction, but doesn't block
+        # writes to the table while the index is built.
+        with op.get_context().autocommit_block():
+            for name, columns in INDEXES.items():
+                op.create_index(
+                    name,
+                    'todos',
+                    columns,
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                )
+    else:
+        for name, columns in INDEXES.items():
+            op.create_index(name, 'todos', columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name in INDEXES:
+                op.drop_index(
+                    name,
+                    table_name='todos',
+                    postgresql_concurrently=True,
+                    if_exists=True,
+                )
+    else:
+        for name in INDEXES:
+            op.drop_index(name, table_name='todos')
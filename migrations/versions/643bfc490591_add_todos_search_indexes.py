@@ -0,0 +1,127 @@
+"""add todos search indexes
+
+Revision ID: 643bfc490591
+Revises: 7b4197794a91
+Create Date: 2025-07-20 10:12:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '643bfc490591'
+down_revision: Union[str, Sequence[str], None] = '7b4197794a91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # Ranked full-text search (GET /todos?q=...)
+        indexes = {
+            'ix_todos_search': {
+                'columns': [
+                    sa.text(
+                        "to_tsvector('simple', title || ' ' || description)"
+                    )
+                ],
+            },
+        }
+        # Trigram indexes so the title/description LIKE '%x%' filters
+        # stop scanning the whole table. pg_trgm ships with contrib, which
+        # some minimal PostgreSQL builds leave out.
+        has_pg_trgm = op.get_bind().scalar(
+            sa.text(
+                "SELECT count(*) FROM pg_available_extensions "
+                "WHERE name = 'pg_trgm'"
+            )
+        )
+        if has_pg_trgm:
+            op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for column in ('title', 'description'):
+                indexes[f'ix_todos_{column}_trgm'] = {
+                    'columns': [column],
+                    'postgresql_ops': {column: 'gin_trgm_ops'},
+                }
+
+        # Same as 5fdd9e7dc507: GIN builds on large tables are slow, don't
+        # block writes to todos meanwhile.
+        with op.get_context().autocommit_block():
+            for name, index in indexes.items():
+                op.create_index(
+                    name,
+                    'todos',
+                    index['columns'],
+                    postgresql_using='gin',
+                    postgresql_ops=index.get('postgresql_ops', {}),
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                )
+
+    elif dialect == 'sqlite':
+        op.execute(
+            """
+            CREATE VIRTUAL TABLE todos_fts USING fts5(
+                title, description, content='todos', content_rowid='id'
+            )
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN
+                INSERT INTO todos_fts (rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN
+                INSERT INTO todos_fts (todos_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER todos_fts_update AFTER UPDATE OF title, description
+            ON todos BEGIN
+                INSERT INTO todos_fts (todos_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO todos_fts (rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+            """
+        )
+        op.execute("INSERT INTO todos_fts (todos_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name in (
+                'ix_todos_description_trgm',
+                'ix_todos_title_trgm',
+                'ix_todos_search',
+            ):
+                op.drop_index(
+                    name,
+                    table_name='todos',
+                    postgresql_concurrently=True,
+                    if_exists=True,
+                )
+
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS todos_fts_update')
+        op.execute('DROP TRIGGER IF EXISTS todos_fts_delete')
+        op.execute('DROP TRIGGER IF EXISTS todos_fts_insert')
+        op.execute('DROP TABLE IF EXISTS todos_fts')
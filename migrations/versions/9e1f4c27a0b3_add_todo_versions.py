@@ -0,0 +1,133 @@
+"""add todo versions
+
+Revision ID: 9e1f4c27a0b3
+Revises: bae56562c2ee
+Create Date: 2025-07-29 10:12:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e1f4c27a0b3'
+down_revision: Union[str, Sequence[str], None] = 'bae56562c2ee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same triggers as fastapi_do_zero/models.py
+POSTGRESQL_VERSIONS = (
+    """
+    CREATE OR REPLACE FUNCTION todos_update_version() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            UPDATE todo_list_versions SET version = version + 1
+            WHERE user_id IN (SELECT user_id FROM old_rows);
+        ELSE
+            INSERT INTO todo_list_versions (user_id, version)
+            SELECT DISTINCT user_id, 1 FROM new_rows ORDER BY user_id
+            ON CONFLICT (user_id) DO UPDATE
+            SET version = todo_list_versions.version + 1;
+        END IF;
+
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE TRIGGER todos_version_insert AFTER INSERT ON todos
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION todos_update_version()
+    """,
+    """
+    CREATE TRIGGER todos_version_update AFTER UPDATE ON todos
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION todos_update_version()
+    """,
+    """
+    CREATE TRIGGER todos_version_delete AFTER DELETE ON todos
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION todos_update_version()
+    """,
+)
+
+SQLITE_VERSIONS = (
+    """
+    CREATE TRIGGER todos_version_insert AFTER INSERT ON todos BEGIN
+        INSERT INTO todo_list_versions (user_id, version)
+        VALUES (new.user_id, 1)
+        ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER todos_version_update AFTER UPDATE ON todos BEGIN
+        INSERT INTO todo_list_versions (user_id, version)
+        VALUES (new.user_id, 1)
+        ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER todos_version_delete AFTER DELETE ON todos BEGIN
+        UPDATE todo_list_versions SET version = version + 1
+        WHERE user_id = old.user_id;
+    END
+    """,
+)
+
+TRIGGERS = (
+    'todos_version_insert',
+    'todos_version_update',
+    'todos_version_delete',
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    op.add_column(
+        'todos',
+        sa.Column(
+            'version', sa.Integer(), server_default=sa.text('1'),
+            nullable=False,
+        ),
+    )
+    op.create_table('todo_list_versions',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    if dialect == 'postgresql':
+        # Writes to todos wait until the triggers exist and the backfill
+        # is committed, so no write is missed.
+        op.execute('LOCK TABLE todos IN SHARE MODE')
+        versions = POSTGRESQL_VERSIONS
+    else:
+        versions = SQLITE_VERSIONS
+
+    for statement in versions:
+        op.execute(statement)
+
+    op.execute(
+        'INSERT INTO todo_list_versions (user_id, version) '
+        'SELECT DISTINCT user_id, 1 FROM todos'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        for trigger in TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger} ON todos')
+        op.execute('DROP FUNCTION IF EXISTS todos_update_version()')
+    else:
+        for trigger in TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+    op.drop_table('todo_list_versions')
+    op.drop_column('todos', 'version')
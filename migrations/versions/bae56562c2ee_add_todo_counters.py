@@ -0,0 +1,175 @@
+"""add todo counters
+
+Revision ID: bae56562c2ee
+Revises: c4e9c12bd5ce
+Create Date: 2025-07-24 08:47:19.602318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bae56562c2ee'
+down_revision: Union[str, Sequence[str], None] = 'c4e9c12bd5ce'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same triggers as fastapi_do_zero/models.py
+POSTGRESQL_COUNTERS = (
+    """
+    CREATE OR REPLACE FUNCTION todos_update_counts() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO todo_state_counts (user_id, state, count)
+            SELECT user_id, state, count(*) FROM new_rows
+            GROUP BY user_id, state ORDER BY user_id, state
+            ON CONFLICT (user_id, state) DO UPDATE
+            SET count = todo_state_counts.count + excluded.count;
+
+            INSERT INTO todo_daily_counts (user_id, day, created)
+            SELECT user_id, CAST(created_at AS DATE), count(*) FROM new_rows
+            GROUP BY 1, 2 ORDER BY 1, 2
+            ON CONFLICT (user_id, day) DO UPDATE
+            SET created = todo_daily_counts.created + excluded.created;
+
+        ELSIF TG_OP = 'UPDATE' THEN
+            INSERT INTO todo_state_counts (user_id, state, count)
+            SELECT user_id, state, sum(delta) FROM (
+                SELECT user_id, state, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT user_id, state, -1 AS delta FROM old_rows
+            ) AS changes
+            GROUP BY user_id, state HAVING sum(delta) <> 0
+            ORDER BY user_id, state
+            ON CONFLICT (user_id, state) DO UPDATE
+            SET count = todo_state_counts.count + excluded.count;
+
+        ELSE
+            -- No upsert: with ON DELETE CASCADE the user, and its
+            -- counters, may already be gone.
+            UPDATE todo_state_counts
+            SET count = todo_state_counts.count - removed.count
+            FROM (
+                SELECT user_id, state, count(*) AS count FROM old_rows
+                GROUP BY user_id, state
+            ) AS removed
+            WHERE todo_state_counts.user_id = removed.user_id
+            AND todo_state_counts.state = removed.state;
+        END IF;
+
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE TRIGGER todos_counts_insert AFTER INSERT ON todos
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION todos_update_counts()
+    """,
+    """
+    CREATE TRIGGER todos_counts_update AFTER UPDATE ON todos
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION todos_update_counts()
+    """,
+    """
+    CREATE TRIGGER todos_counts_delete AFTER DELETE ON todos
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION todos_update_counts()
+    """,
+)
+
+SQLITE_COUNTERS = (
+    """
+    CREATE TRIGGER todos_counts_insert AFTER INSERT ON todos BEGIN
+        INSERT INTO todo_state_counts (user_id, state, count)
+        VALUES (new.user_id, new.state, 1)
+        ON CONFLICT (user_id, state) DO UPDATE SET count = count + 1;
+        INSERT INTO todo_daily_counts (user_id, day, created)
+        VALUES (new.user_id, date(new.created_at), 1)
+        ON CONFLICT (user_id, day) DO UPDATE SET created = created + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER todos_counts_update AFTER UPDATE OF user_id, state
+    ON todos BEGIN
+        UPDATE todo_state_counts SET count = count - 1
+        WHERE user_id = old.user_id AND state = old.state;
+        INSERT INTO todo_state_counts (user_id, state, count)
+        VALUES (new.user_id, new.state, 1)
+        ON CONFLICT (user_id, state) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER todos_counts_delete AFTER DELETE ON todos BEGIN
+        UPDATE todo_state_counts SET count = count - 1
+        WHERE user_id = old.user_id AND state = old.state;
+    END
+    """,
+)
+
+TRIGGERS = ('todos_counts_insert', 'todos_counts_update', 'todos_counts_delete')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    # todostate already exists, created with the todos table.
+    state_type = sa.Enum(
+        'draft', 'todo', 'doing', 'done', 'trash', name='todostate'
+    ).with_variant(
+        postgresql.ENUM(name='todostate', create_type=False), 'postgresql'
+    )
+
+    op.create_table('todo_state_counts',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('state', state_type, nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'state')
+    )
+    op.create_table('todo_daily_counts',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('created', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+
+    if dialect == 'postgresql':
+        # Writes to todos wait until the triggers exist and the backfill
+        # is committed, so no change is counted twice or missed.
+        op.execute('LOCK TABLE todos IN SHARE MODE')
+        counters, day = POSTGRESQL_COUNTERS, 'CAST(created_at AS DATE)'
+    else:
+        counters, day = SQLITE_COUNTERS, 'date(created_at)'
+
+    for statement in counters:
+        op.execute(statement)
+
+    op.execute(
+        'INSERT INTO todo_state_counts (user_id, state, count) '
+        'SELECT user_id, state, count(*) FROM todos GROUP BY user_id, state'
+    )
+    op.execute(
+        'INSERT INTO todo_daily_counts (user_id, day, created) '
+        f'SELECT user_id, {day}, count(*) FROM todos GROUP BY 1, 2'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        for trigger in TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger} ON todos')
+        op.execute('DROP FUNCTION IF EXISTS todos_update_counts()')
+    else:
+        for trigger in TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+    op.drop_table('todo_daily_counts')
+    op.drop_table('todo_state_counts')
@@ -0,0 +1,72 @@
+"""add todo tombstones
+
+Revision ID: c4e9c12bd5ce
+Revises: d587485c3bb4
+Create Date: 2025-07-23 10:12:45.381920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e9c12bd5ce'
+down_revision: Union[str, Sequence[str], None] = 'd587485c3bb4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# GET /todos/changes: WHERE user_id = ? AND (updated_at, id) > (?, ?)
+UPDATED_AT_INDEX = 'ix_todos_user_id_updated_at_id'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('todo_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('todo_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_todo_tombstones_user_id_deleted_at',
+        'todo_tombstones',
+        ['user_id', 'deleted_at', 'todo_id'],
+    )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # Same as 5fdd9e7dc507, don't block writes to todos.
+        with op.get_context().autocommit_block():
+            op.create_index(
+                UPDATED_AT_INDEX,
+                'todos',
+                ['user_id', 'updated_at', 'id'],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+    else:
+        op.create_index(
+            UPDATED_AT_INDEX, 'todos', ['user_id', 'updated_at', 'id']
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                UPDATED_AT_INDEX,
+                table_name='todos',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    else:
+        op.drop_index(UPDATED_AT_INDEX, table_name='todos')
+
+    op.drop_index(
+        'ix_todo_tombstones_user_id_deleted_at', table_name='todo_tombstones'
+    )
+    op.drop_table('todo_tombstones')
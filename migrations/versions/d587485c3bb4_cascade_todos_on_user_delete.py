@@ -0,0 +1,96 @@
+"""cascade todos on user delete
+
+Revision ID: d587485c3bb4
+Revises: 5fdd9e7dc507
+Create Date: 2025-07-22 18:03:27.109442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd587485c3bb4'
+down_revision: Union[str, Sequence[str], None] = '5fdd9e7dc507'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQLite foreign keys created by 7b4197794a91 have no name, this gives the
+# reflected constraint one so batch mode can drop it.
+NAMING_CONVENTION = {
+    'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s',
+}
+
+
+# Batch mode recreates the todos table on SQLite, dropping the triggers
+# that keep todos_fts (643bfc490591) in sync.
+FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN
+        INSERT INTO todos_fts (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN
+        INSERT INTO todos_fts (todos_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER todos_fts_update AFTER UPDATE OF title, description
+    ON todos BEGIN
+        INSERT INTO todos_fts (todos_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO todos_fts (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+)
+
+
+def _replace_foreign_key(ondelete):
+    if op.get_bind().dialect.name == 'postgresql':
+        # NOT VALID + VALIDATE avoids holding an exclusive lock on todos
+        # while every existing row is checked: the swap takes the ACCESS
+        # EXCLUSIVE lock but checks nothing, and is committed right away.
+        on_delete = f'ON DELETE {ondelete}' if ondelete else ''
+        op.execute(
+            'ALTER TABLE todos '
+            'DROP CONSTRAINT todos_user_id_fkey, '
+            'ADD CONSTRAINT todos_user_id_fkey FOREIGN KEY (user_id) '
+            f'REFERENCES users (id) {on_delete} NOT VALID'
+        )
+        # Locks are held until the transaction ends, so VALIDATE, which
+        # only takes a SHARE UPDATE EXCLUSIVE lock, runs in its own.
+        with op.get_context().autocommit_block():
+            op.execute(
+                'ALTER TABLE todos VALIDATE CONSTRAINT todos_user_id_fkey'
+            )
+        return
+
+    with op.batch_alter_table(
+        'todos', naming_convention=NAMING_CONVENTION
+    ) as batch_op:
+        batch_op.drop_constraint('fk_todos_user_id_users', type_='foreignkey')
+        batch_op.create_foreign_key(
+            'fk_todos_user_id_users',
+            'users',
+            ['user_id'],
+            ['id'],
+            ondelete=ondelete,
+        )
+
+    for trigger in FTS_TRIGGERS:
+        op.execute(trigger)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace_foreign_key('CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_foreign_key(None)
@@ -1,3 +1,4 @@
+import time
 from contextlib import contextmanager
 from datetime import datetime
 
@@ -10,9 +11,11 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from testcontainers.postgres import PostgresContainer
 
 from fastapi_do_zero.app import app
+from fastapi_do_zero.cache import LocalCache
 from fastapi_do_zero.database import get_session
 from fastapi_do_zero.models import User, table_registry
-from fastapi_do_zero.security import get_password_hash
+from fastapi_do_zero.routers import auth, users
+from fastapi_do_zero.security import get_password_hash, principal_cache
 from fastapi_do_zero.settings import Settings
 
 
@@ -25,6 +28,39 @@ class UserFactory(factory.Factory):
     password = factory.LazyAttribute(lambda obj: f'{obj.username}@example.com')
 
 
+class FakeRedis:
+    """
+    In-memory stand-in for the `redis.asyncio.Redis` commands used by
+    `SharedCache`.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.available = True
+
+    def check(self):
+        if not self.available:
+            raise ConnectionError('Connection refused')
+
+    async def get(self, key):
+        self.check()
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    async def set(self, key, value, px=None):
+        self.check()
+        expires_at = time.monotonic() + px / 1000 if px else None
+        self.data[key] = (value, expires_at)
+
+    async def delete(self, *keys):
+        self.check()
+        for key in keys:
+            self.data.pop(key, None)
+
+
 @pytest.fixture(scope='session')
 def engine():
     with PostgresContainer('postgres:16', driver='psycopg') as postgres:
@@ -32,6 +68,31 @@ def engine():
         yield _engine
 
 
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """
+    Fixture to make sure no authenticated user leaks between tests.
+    """
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def user_cache(monkeypatch):
+    """
+    A fresh user cache for every test, ids are reused between tests.
+    """
+    cache = LocalCache(max_size=100, ttl=60)
+    monkeypatch.setattr(users, 'user_cache', cache)
+    return cache
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
 @pytest.fixture
 def settings():
     """
@@ -89,12 +150,15 @@ async def other_user(session):
 
 
 @pytest.fixture
-def client(session):
+def client(session, engine, monkeypatch):
     """
     Fixture to create a TestClient for the FastAPI application.
     This allows us to use the client in our tests without needing to
     instantiate it multiple times.
     """
+    # Background tasks open their own sessions on the app's engine.
+    monkeypatch.setattr(users, 'engine', engine)
+    monkeypatch.setattr(auth, 'engine', engine)
 
     def get_session_override():
         return session
@@ -118,6 +182,48 @@ async def session(engine):
         await conn.run_sync(table_registry.metadata.drop_all)
 
 
+@pytest.fixture
+def sql_statements(engine):
+    """
+    Fixture to capture every SQL statement sent to the database.
+    Useful to assert how many queries an endpoint performs.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(
+        engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+    )
+    yield statements
+    event.remove(
+        engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+    )
+
+
+@pytest.fixture
+def sql_executions(engine):
+    """
+    Fixture to capture every SQL statement sent to the database, with its
+    parameters, so they can be run again (e.g. under EXPLAIN).
+    """
+    executions = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, *args):
+        _context, executemany = args
+        if not executemany:
+            executions.append((statement, parameters))
+
+    event.listen(
+        engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+    )
+    yield executions
+    event.remove(
+        engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+    )
+
+
 @pytest.fixture
 def mock_db_time():
     """
@@ -9,3 +9,17 @@ async def test_root_deve_retornar_ok(client):
 
     assert response.status_code == HTTPStatus.OK
     assert response.json() == {'message': 'Up!'}
+
+
+def test_openapi_deve_documentar_as_listas_serializadas_pelo_pydantic(
+    client,
+):
+    paths = client.get('/openapi.json').json()['paths']
+
+    def schema(path):
+        content = paths[path]['get']['responses']['200']['content']
+        return content['application/json']['schema']['$ref']
+
+    assert schema('/todos/').endswith('/TodoListSchema')
+    assert schema('/users/').endswith('/UserListSchema')
+    assert schema('/todos/changes').endswith('/TodoChangesSchema')
@@ -1,8 +1,19 @@
 from http import HTTPStatus
 
+import pytest
+import pytest_asyncio
 from freezegun import freeze_time
+from sqlalchemy import select
 
-from fastapi_do_zero.security import create_access_token
+from fastapi_do_zero.models import User
+from fastapi_do_zero.routers import auth
+from fastapi_do_zero.routers.auth import upgrade_password_hash
+from fastapi_do_zero.security import (
+    create_access_token,
+    password_context,
+    password_needs_rehash,
+    verify_password,
+)
 
 
 def test_create_token_deve_retornar_token_para_usuario_existente(client, user):
@@ -111,3 +122,91 @@ def test_token_expirado_deve_retornar_403_ao_renovar(client, user):
         )
         assert response.status_code == HTTPStatus.UNAUTHORIZED
         assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+@pytest_asyncio.fixture
+async def outdated_user(session):
+    """
+    A user whose password was hashed with cheaper Argon2 parameters.
+    """
+    password = 'testtest'
+    old_context = password_context(
+        time_cost=1, memory_cost=8192, parallelism=1
+    )
+    user = User(
+        username='outdated',
+        email='outdated@test.com',
+        password=old_context.hash(password),
+    )
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    user.clean_password = password
+    return user
+
+
+@pytest.mark.asyncio
+async def test_login_deve_atualizar_hash_com_parametros_antigos(
+    client, session, outdated_user
+):
+    old_hash = outdated_user.password
+
+    response = client.post(
+        '/auth/token',
+        data={
+            'username': outdated_user.email,
+            'password': outdated_user.clean_password,
+        },
+    )
+
+    new_hash = await session.scalar(
+        select(User.password)
+        .where(User.id == outdated_user.id)
+        .execution_options(populate_existing=True)
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert new_hash != old_hash
+    assert not password_needs_rehash(new_hash)
+    assert verify_password(outdated_user.clean_password, new_hash)
+
+
+@pytest.mark.asyncio
+async def test_login_nao_deve_atualizar_hash_com_parametros_atuais(
+    client, session, user
+):
+    old_hash = user.password
+
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert not password_needs_rehash(old_hash)
+    assert (
+        await session.scalar(select(User.password).where(User.id == user.id))
+        == old_hash
+    )
+
+
+@pytest.mark.asyncio
+async def test_upgrade_password_hash_nao_deve_sobrescrever_senha_alterada(
+    session, engine, monkeypatch, outdated_user
+):
+    monkeypatch.setattr(auth, 'engine', engine)
+    changed_hash = outdated_user.password
+
+    await upgrade_password_hash(
+        outdated_user.id,
+        outdated_user.email,
+        'a hash replaced meanwhile',
+        outdated_user.clean_password,
+    )
+
+    assert (
+        await session.scalar(
+            select(User.password).where(User.id == outdated_user.id)
+        )
+        == changed_hash
+    )
@@ -1,10 +1,19 @@
 from dataclasses import asdict
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import insert, select, text
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from fastapi_do_zero.models import Todo, User
+from fastapi_do_zero.database import (
+    create_engine,
+    engine_options,
+    warm_up_pool,
+)
+from fastapi_do_zero.models import Todo, TodoState, User, table_registry
+from fastapi_do_zero.pagination import encode_cursor
+from fastapi_do_zero.settings import Settings
 
 
 @pytest.mark.asyncio
@@ -16,7 +25,11 @@ async def test_create_user(session: AsyncSession, mock_db_time):
         session.add(new_user)
         await session.commit()
 
-    user = await session.scalar(select(User).where(User.username == 'alice'))
+    user = await session.scalar(
+        select(User)
+        .options(selectinload(User.todos))
+        .where(User.username == 'alice')
+    )
 
     assert asdict(user) == {
         'id': 1,
@@ -52,9 +65,30 @@ async def test_create_todo(session, user, mock_db_time):
         'id': 1,
         'created_at': time,
         'updated_at': time,
+        'version': 1,
+        'change_id': todo.change_id,
     }
 
 
+@pytest.mark.asyncio
+async def test_create_all_deve_manter_as_tabelas_existentes(
+    engine, session, user
+):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    session.add(
+        Todo(title='Test', description='Test', state='draft', user_id=user.id)
+    )
+    await session.commit()
+
+    count = await session.scalar(
+        text('SELECT count FROM todo_state_counts WHERE user_id = :id'),
+        {'id': user.id},
+    )
+    assert count == 1
+
+
 @pytest.mark.asyncio
 async def test_user_todo_relationship(session, user: User):
     todo = Todo(
@@ -68,6 +102,177 @@ async def test_user_todo_relationship(session, user: User):
     await session.commit()
     await session.refresh(user)
 
-    user = await session.scalar(select(User).where(User.id == user.id))
+    user = await session.scalar(
+        select(User)
+        .options(selectinload(User.todos))
+        .where(User.id == user.id)
+    )
 
     assert user.todos == [todo]
+
+
+@pytest.mark.asyncio
+async def test_user_todos_nao_deve_ser_carregado_implicitamente(
+    session, user: User
+):
+    user = await session.scalar(select(User).where(User.id == user.id))
+
+    with pytest.raises(InvalidRequestError):
+        user.todos
+
+
+@pytest.mark.asyncio
+async def test_repr_de_user_nao_deve_carregar_todos(session, user: User):
+    user = await session.scalar(select(User).where(User.id == user.id))
+
+    assert 'todos' not in repr(user)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ('method', 'url', 'body', 'indexes'),
+    [
+        ('GET', '/todos/?limit=10', None, {'ix_todos_user_id_id'}),
+        (
+            'GET',
+            f'/todos/?limit=10&cursor={encode_cursor({"id": 10})}',
+            None,
+            {'ix_todos_user_id_id'},
+        ),
+        (
+            'GET',
+            '/todos/?limit=10&state=done',
+            None,
+            {'ix_todos_user_id_state_id'},
+        ),
+        ('PATCH', '/todos/21', {'title': 'x'}, {'ix_todos_user_id_id'}),
+        ('DELETE', '/todos/21', None, {'ix_todos_user_id_id'}),
+    ],
+)
+async def test_consultas_de_todos_nao_devem_fazer_seq_scan(  # noqa: PLR0913, PLR0917
+    session,
+    client,
+    user,
+    other_user,
+    token,
+    sql_executions,
+    method,
+    url,
+    body,
+    indexes,
+):
+    await session.execute(
+        insert(Todo),
+        [
+            {
+                'title': f'Todo {i}',
+                'description': '',
+                'state': list(TodoState)[i % len(TodoState)],
+                # Most rows belong to someone else, as in a shared table.
+                'user_id': user.id if i % 5 == 0 else other_user.id,
+            }
+            for i in range(5000)
+        ],
+    )
+    await session.commit()
+    await session.execute(text('ANALYZE todos'))
+    await session.commit()
+    sql_executions.clear()
+
+    response = client.request(
+        method, url, json=body, headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.is_success
+    statements = [
+        (statement, parameters)
+        for statement, parameters in sql_executions
+        if 'todos' in statement
+    ]
+
+    await session.execute(text('SET LOCAL enable_seqscan = off'))
+    connection = await session.connection()
+    plans = []
+    for statement, parameters in statements:
+        plan = await connection.exec_driver_sql(
+            f'EXPLAIN {statement}', parameters
+        )
+        plans.extend(plan.scalars())
+    await session.rollback()
+
+    plan = '\n'.join(plans)
+    assert statements
+    assert 'Seq Scan' not in plan
+    for index in indexes:
+        assert index in plan
+
+
+def test_engine_options_postgresql_deve_configurar_pool_e_timeout():
+    options = engine_options(
+        Settings(DATABASE_URL='postgresql+psycopg://app@localhost/app')
+    )
+
+    assert options['pool_size'] == Settings().DB_POOL_SIZE
+    assert options['pool_pre_ping'] is True
+    assert options['connect_args'] == {
+        'options': f'-c statement_timeout={Settings().DB_STATEMENT_TIMEOUT_MS}'
+    }
+
+
+def test_engine_options_pgbouncer_deve_desativar_prepared_statements():
+    options = engine_options(
+        Settings(
+            DATABASE_URL='postgresql+psycopg://app@localhost/app',
+            DB_PGBOUNCER=True,
+        )
+    )
+
+    assert options['connect_args'] == {'prepare_threshold': None}
+
+
+@pytest.mark.asyncio
+async def test_engine_pgbouncer_deve_aplicar_timeout_por_transacao(engine):
+    db_engine = create_engine(
+        Settings(
+            DATABASE_URL=engine.url.render_as_string(hide_password=False),
+            DB_PGBOUNCER=True,
+            DB_STATEMENT_TIMEOUT_MS=1234,
+        )
+    )
+
+    try:
+        async with db_engine.connect() as connection:
+            timeout = await connection.scalar(text('SHOW statement_timeout'))
+    finally:
+        await db_engine.dispose()
+
+    assert timeout == '1234ms'
+
+
+def test_engine_options_sqlite_em_memoria_nao_deve_configurar_pool():
+    options = engine_options(
+        Settings(DATABASE_URL='sqlite+aiosqlite:///:memory:')
+    )
+
+    assert 'pool_size' not in options
+
+
+@pytest.mark.asyncio
+async def test_engine_sqlite_deve_usar_wal_e_aquecer_pool(tmp_path):
+    expected_connections = 2
+    db_engine = create_engine(
+        Settings(
+            DATABASE_URL=f'sqlite+aiosqlite:///{tmp_path / "test.db"}',
+            DB_POOL_SIZE=expected_connections,
+        )
+    )
+
+    await warm_up_pool(db_engine, connections=5)
+
+    async with db_engine.connect() as connection:
+        journal_mode = await connection.scalar(text('PRAGMA journal_mode'))
+        foreign_keys = await connection.scalar(text('PRAGMA foreign_keys'))
+
+    assert db_engine.pool.checkedin() == expected_connections
+    assert journal_mode == 'wal'
+    assert foreign_keys == 1
+    await db_engine.dispose()
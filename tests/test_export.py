@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+import tracemalloc
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import insert
+
+from fastapi_do_zero.export import EXPORT_FIELDS, export_query, export_todos
+from fastapi_do_zero.models import Todo, TodoState
+
+
+async def add_todos(session, user_id, count):
+    await session.execute(
+        insert(Todo),
+        [
+            {
+                'title': f'Todo {n}',
+                'description': 'Exported, with "quotes"',
+                'state': TodoState.todo,
+                'user_id': user_id,
+            }
+            for n in range(count)
+        ],
+    )
+    await session.commit()
+
+
+async def export_peak_memory(session, user_id):
+    tracemalloc.start()
+    try:
+        async for _ in export_todos(session, export_query(user_id), 'ndjson'):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson_deve_retornar_uma_linha_por_todo(
+    session, client, user, other_user, token
+):
+    await add_todos(session, user.id, 3)
+    await add_todos(session, other_user.id, 2)
+
+    response = client.get(
+        '/todos/export', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [row['title'] for row in rows] == ['Todo 0', 'Todo 1', 'Todo 2']
+    assert set(rows[0]) == set(EXPORT_FIELDS)
+
+
+@pytest.mark.asyncio
+async def test_export_csv_deve_escapar_os_campos(session, client, user, token):
+    await add_todos(session, user.id, 2)
+
+    response = client.get(
+        '/todos/export',
+        headers={'Authorization': f'Bearer {token}'},
+        params={'format': 'csv'},
+    )
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    assert 'todos.csv' in response.headers['content-disposition']
+    assert [row['description'] for row in rows] == [
+        'Exported, with "quotes"'
+    ] * 2
+    assert rows[0]['state'] == 'todo'
+
+
+def test_export_com_formato_invalido_deve_retornar_422(client, token):
+    response = client.get(
+        '/todos/export',
+        headers={'Authorization': f'Bearer {token}'},
+        params={'format': 'xml'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_export_deve_manter_o_pico_de_memoria_constante(session, user):
+    await add_todos(session, user.id, 2_000)
+    small = await export_peak_memory(session, user.id)
+
+    await add_todos(session, user.id, 18_000)
+    large = await export_peak_memory(session, user.id)
+
+    # 10x the rows, the peak only depends on the chunk size.
+    assert large < small * 2
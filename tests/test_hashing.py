@@ -0,0 +1,54 @@
+import asyncio
+from http import HTTPStatus
+from threading import Event
+
+import pytest
+
+from fastapi_do_zero.exceptions.auth import HashingPoolBusyException
+from fastapi_do_zero.hashing import HashingPool
+from fastapi_do_zero.security import (
+    get_password_hash_async,
+    verify_password,
+    verify_password_async,
+)
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_deve_executar_funcao_e_registrar_metricas():
+    pool = HashingPool(workers=2, max_queue=2)
+
+    result = await pool.run(str.upper, 'secret')
+
+    stats = pool.snapshot()
+    assert result == 'SECRET'
+    assert stats['completed'] == 1
+    assert stats['pending'] == 0
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_deve_rejeitar_quando_fila_estiver_cheia():
+    pool = HashingPool(workers=1, max_queue=0)
+    release = Event()
+
+    blocked = asyncio.ensure_future(pool.run(release.wait))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HashingPoolBusyException) as exc_info:
+        await pool.run(str.upper, 'secret')
+
+    release.set()
+    await blocked
+
+    assert exc_info.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert pool.snapshot()['rejected'] == 1
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hash_assincrono_deve_ser_verificavel():
+    hashed = await get_password_hash_async('secret')
+
+    assert verify_password('secret', hashed)
+    assert await verify_password_async('secret', hashed)
+    assert not await verify_password_async('wrong', hashed)
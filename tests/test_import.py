@@ -0,0 +1,155 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import func, select
+
+from fastapi_do_zero.importer import IMPORT_MAX_ERRORS
+from fastapi_do_zero.models import Todo
+
+
+def test_import_ndjson_deve_reportar_linhas_invalidas(client, token):
+    lines = [
+        {'title': 'Um', 'description': 'Primeiro', 'state': 'todo'},
+        {'title': 'Dois', 'description': 'Segundo', 'state': 'invalid'},
+        {'title': 'Três', 'description': 'Terceiro', 'state': 'done'},
+    ]
+    body = '\n'.join(json.dumps(line) for line in lines) + '\n{broken\n'
+
+    response = client.post(
+        '/todos/import',
+        headers={'Authorization': f'Bearer {token}'},
+        content=body.encode(),
+    )
+
+    data = response.json()
+    assert response.status_code == HTTPStatus.CREATED
+    assert data['imported'] == len(lines) - 1
+    assert [error['row'] for error in data['errors']] == [2, 4]
+    assert data['errors'][0]['detail'].startswith('state:')
+
+
+def test_import_deve_reportar_linhas_com_utf8_invalido(client, token):
+    body = (
+        b'{"title": "Um", "description": "Primeiro", "state": "todo"}\n'
+        b'{"title": "Dois \xff", "description": "Segundo", "state": "todo"}\n'
+        b'{"title": "Tr\xc3\xaas", "description": "Terceiro", "state": "done"}'
+    )
+
+    response = client.post(
+        '/todos/import',
+        headers={'Authorization': f'Bearer {token}'},
+        content=body,
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json() == {
+        'imported': 2,
+        'failed': 1,
+        'errors': [{'row': 2, 'detail': 'Invalid UTF-8'}],
+    }
+
+
+@pytest.mark.asyncio
+async def test_import_csv_deve_aceitar_campos_com_quebra_de_linha(
+    session, client, user, token
+):
+    body = (
+        'title,description,state\r\n'
+        'Um,"Várias\nlinhas, com ""aspas""",todo\r\n'
+        'Dois,Simples,done\r\n'
+    ).encode()
+    # Uploaded in small chunks, splitting lines and multi-byte characters.
+    chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+
+    response = client.post(
+        '/todos/import',
+        headers={'Authorization': f'Bearer {token}'},
+        params={'format': 'csv'},
+        content=iter(chunks),
+    )
+
+    todos = await session.scalars(
+        select(Todo).where(Todo.user_id == user.id).order_by(Todo.id)
+    )
+    assert response.json() == {'imported': 2, 'failed': 0, 'errors': []}
+    assert [todo.description for todo in todos] == [
+        'Várias\nlinhas, com "aspas"',
+        'Simples',
+    ]
+
+
+@pytest.mark.parametrize(
+    ('rows', 'failed_rows'),
+    [
+        # Never closed: would swallow the rest of the file.
+        (['A,"Sem fim,todo', 'B,Dois,todo', 'C,Três,done'], [1]),
+        # Closed by a later bad row, the joined record isn't valid CSV.
+        (['A,"Sem fim,todo', 'B,Dois,todo', 'C,"Três,done'], [1, 3]),
+        # Closed by a later row, the joined record has too many columns.
+        (
+            ['A,"Sem fim,todo', 'B,Dois",todo,extra', 'C,Três,done'],
+            [1, 2],
+        ),
+    ],
+)
+def test_import_csv_com_aspas_desbalanceadas_deve_perder_apenas_a_linha(
+    client, token, rows, failed_rows
+):
+    body = 'title,description,state\n' + '\n'.join(rows) + '\n'
+
+    response = client.post(
+        '/todos/import',
+        headers={'Authorization': f'Bearer {token}'},
+        params={'format': 'csv'},
+        content=body.encode(),
+    )
+
+    data = response.json()
+    assert data['imported'] == len(rows) - len(failed_rows)
+    assert [error['row'] for error in data['errors']] == failed_rows
+
+
+def test_import_csv_deve_aceitar_o_arquivo_do_export(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post(
+        '/todos/bulk',
+        headers=headers,
+        json=[
+            {'title': f'Todo {i}', 'description': 'Export', 'state': 'todo'}
+            for i in range(3)
+        ],
+    )
+    exported = client.get(
+        '/todos/export', headers=headers, params={'format': 'csv'}
+    ).content
+
+    response = client.post(
+        '/todos/import',
+        headers=headers,
+        params={'format': 'csv'},
+        content=exported,
+    )
+
+    assert response.json()['imported'] == len(exported.splitlines()) - 1
+
+
+@pytest.mark.asyncio
+async def test_import_deve_limitar_os_erros_reportados(
+    session, client, user, token
+):
+    body = '{"title": "x"}\n' * (IMPORT_MAX_ERRORS + 5)
+
+    response = client.post(
+        '/todos/import',
+        headers={'Authorization': f'Bearer {token}'},
+        content=body.encode(),
+    )
+
+    data = response.json()
+    count = await session.scalar(
+        select(func.count()).where(Todo.user_id == user.id)
+    )
+    assert data['failed'] == IMPORT_MAX_ERRORS + 5
+    assert len(data['errors']) == IMPORT_MAX_ERRORS
+    assert count == 0
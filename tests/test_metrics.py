@@ -0,0 +1,117 @@
+from http import HTTPStatus
+
+from prometheus_client import REGISTRY, CollectorRegistry
+from sqlalchemy import event
+
+from fastapi_do_zero.hashing import HashingPool
+from fastapi_do_zero.metrics import HashingPoolCollector, SingleFlightCollector
+from fastapi_do_zero.singleflight import SingleFlight
+from fastapi_do_zero.telemetry import before_statement
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_metrics_deve_expor_requisicoes_por_rota(client, user, token):
+    client.get(
+        f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    assert (
+        'http_requests_total{method="GET",route="/users/{user_id}",'
+        'status="200"}'
+    ) in response.text
+    assert 'http_requests_in_progress{method="GET"} 1.0' in response.text
+
+
+def test_metrics_deve_contar_falhas_de_decodificacao_do_jwt(client):
+    before = sample('jwt_decode_failures_total', reason='invalid')
+
+    client.get('/todos/', headers={'Authorization': 'Bearer invalid'})
+
+    assert sample('jwt_decode_failures_total', reason='invalid') == before + 1
+
+
+def test_metrics_deve_contar_consultas_por_requisicao(client, engine, token):
+    before = sample('db_statements_per_request_sum', route='/todos/')
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', before_statement)
+    try:
+        client.get('/todos/', headers={'Authorization': f'Bearer {token}'})
+    finally:
+        event.remove(
+            engine.sync_engine, 'before_cursor_execute', before_statement
+        )
+
+    # The user, the list version and the page.
+    statements = sample('db_statements_per_request_sum', route='/todos/')
+    assert statements - before == 3  # noqa: PLR2004
+    assert 'db_statements_per_request_count{route="/todos/"}' in (
+        client.get('/metrics').text
+    )
+
+
+def test_metrics_deve_expor_estatisticas_do_cache_de_usuarios(client, token):
+    name = 'auth_principal_cache_lookups_total'
+    hits = sample(name, result='hit')
+    misses = sample(name, result='miss')
+
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/todos/', headers=headers)
+    client.get('/todos/', headers=headers)
+
+    assert sample(name, result='miss') == misses + 1
+    assert sample(name, result='hit') == hits + 1
+    assert sample('auth_principal_cache_entries') == 1
+    assert 'auth_principal_cache_evictions_total' in (
+        client.get('/metrics').text
+    )
+
+
+def test_metrics_deve_expor_chamadas_agrupadas_do_singleflight():
+    registry = CollectorRegistry()
+    flight = SingleFlight()
+    flight.stats.executed = 2
+    flight.stats.collapsed = 5
+    registry.register(SingleFlightCollector('pages', flight))
+
+    def calls(result: str) -> float:
+        return registry.get_sample_value(
+            'pages_calls_total', {'result': result}
+        )
+
+    assert calls('executed') == flight.stats.executed
+    assert calls('collapsed') == flight.stats.collapsed
+    assert registry.get_sample_value('pages_in_flight') == 0
+
+
+def test_metrics_deve_expor_singleflight_das_paginas_de_todos(client):
+    response = client.get('/metrics')
+
+    assert 'todo_pages_calls_total{result="collapsed"}' in response.text
+    assert 'todo_pages_in_flight 0.0' in response.text
+
+
+def test_hashing_pool_collector_deve_exportar_rejeicoes_e_fila():
+    registry = CollectorRegistry()
+    pool = HashingPool(workers=1, max_queue=0)
+    pool.stats.rejected = 3
+    registry.register(HashingPoolCollector('hashing', pool))
+
+    assert (
+        registry.get_sample_value('hashing_rejected_total')
+        == pool.stats.rejected
+    )
+    assert registry.get_sample_value('hashing_pending') == 0
+
+
+def test_metrics_deve_expor_o_pool_de_hash_de_senhas(client):
+    response = client.get('/metrics')
+
+    assert 'password_hash_pool_rejected_total' in response.text
+    assert 'password_hash_pool_pending' in response.text
@@ -0,0 +1,86 @@
+import time
+from http import HTTPStatus
+from threading import Event, Thread
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from fastapi_do_zero.profiling import (
+    ProfilingMiddleware,
+    RateLimiter,
+    StackSampler,
+)
+
+
+def make_client(output_dir, **options) -> TestClient:
+    app = FastAPI()
+
+    @app.get('/busy')
+    def busy():
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        return {'message': 'done'}
+
+    app.add_middleware(
+        ProfilingMiddleware,
+        token='secret',
+        output_dir=str(output_dir),
+        **options,
+    )
+    return TestClient(app)
+
+
+def test_stack_sampler_deve_registrar_pilhas_das_threads():
+    release = Event()
+    worker = Thread(target=release.wait, name='worker')
+    worker.start()
+
+    sampler = StackSampler(interval=0.001)
+    sampler.sample()
+    release.set()
+    worker.join()
+
+    [stack] = [s for s in sampler.stacks if s.startswith('worker;')]
+    assert 'Event.wait' in stack
+    assert stack.index('Thread.run') < stack.index('Event.wait')
+    assert sampler.collapsed().endswith(' 1\n')
+
+
+def test_rate_limiter_deve_limitar_chamadas_por_periodo():
+    limiter = RateLimiter(limit=2, period=60)
+
+    assert limiter.acquire()
+    assert limiter.acquire()
+    assert not limiter.acquire()
+
+
+def test_profiling_deve_gravar_perfil_da_requisicao(tmp_path):
+    client = make_client(tmp_path)
+
+    response = client.get('/busy', headers={'X-Profile': 'secret'})
+
+    assert response.status_code == HTTPStatus.OK
+    profile = tmp_path / f'{response.headers["X-Profile"]}.folded'
+    assert 'busy (' in profile.read_text()
+
+
+def test_profiling_deve_ignorar_token_invalido(tmp_path):
+    client = make_client(tmp_path)
+
+    response = client.get('/busy', headers={'X-Profile': 'wrong'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'X-Profile' not in response.headers
+    assert not list(tmp_path.iterdir())
+
+
+def test_profiling_deve_respeitar_limite_por_minuto(tmp_path):
+    client = make_client(tmp_path, max_per_minute=1)
+
+    first = client.get('/busy', headers={'X-Profile': 'secret'})
+    second = client.get('/busy', headers={'X-Profile': 'secret'})
+
+    assert 'X-Profile' in first.headers
+    assert second.status_code == HTTPStatus.OK
+    assert 'X-Profile' not in second.headers
@@ -1,8 +1,14 @@
 from http import HTTPStatus
 
+from freezegun import freeze_time
 from jwt import decode
 
-from fastapi_do_zero.security import create_access_token
+from fastapi_do_zero.cache import TTLCache
+from fastapi_do_zero.security import (
+    create_access_token,
+    password_context,
+    principal_cache,
+)
 
 
 def test_jwt(settings):
@@ -24,3 +30,72 @@ def test_jwt_invalid_token(client):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_get_current_user_deve_registrar_hits_e_misses_do_cache(client, token):
+    expected_hits = 2
+    principal_cache_stats = principal_cache.stats()
+
+    for _ in range(3):
+        client.post(
+            '/auth/refresh_token',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    stats = principal_cache.stats()
+    assert stats['misses'] - principal_cache_stats['misses'] == 1
+    assert stats['hits'] - principal_cache_stats['hits'] == expected_hits
+    assert stats['size'] == 1
+
+
+def test_cache_de_usuarios_deve_ser_invalidado_ao_atualizar(
+    client, user, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+
+    response = client.put(
+        f'/users/{user.id}',
+        headers=headers,
+        json={
+            'username': 'bob',
+            'email': 'bob@example.com',
+            'password': 'new_secret',
+        },
+    )
+    assert response.status_code == HTTPStatus.OK
+
+    response = client.post('/auth/refresh_token', headers=headers)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_ttl_cache_deve_descartar_entrada_menos_usada():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_cache_deve_expirar_entradas():
+    cache = TTLCache(max_size=2, ttl=60)
+
+    with freeze_time('2025-07-01 12:00:00') as frozen_time:
+        cache.set('a', 1)
+        frozen_time.tick(61)
+
+        assert cache.get('a') is None
+
+
+def test_password_context_deve_usar_custos_do_argon2():
+    context = password_context(time_cost=1, memory_cost=8192, parallelism=1)
+
+    hashed = context.hash('secret')
+
+    assert hashed.startswith('$argon2id$v=19$m=8192,t=1,p=1$')
+    assert context.verify('secret', hashed)
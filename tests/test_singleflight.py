@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from fastapi_do_zero.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_singleflight_deve_executar_chamadas_concorrentes_uma_vez():
+    flight = SingleFlight()
+    release = asyncio.Event()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await release.wait()
+        return b'page'
+
+    tasks = [asyncio.ensure_future(flight.do('key', load)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == [b'page'] * 5
+    assert len(calls) == 1
+    assert flight.snapshot() == {
+        'executed': 1,
+        'collapsed': 4,
+        'in_flight': 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_singleflight_deve_executar_novamente_apos_terminar():
+    flight = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return len(calls)
+
+    assert await flight.do('key', load) == 1
+    assert await flight.do('key', load) == 2  # noqa: PLR2004
+    assert flight.stats.collapsed == 0
+
+
+@pytest.mark.asyncio
+async def test_singleflight_nao_deve_agrupar_chaves_diferentes():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def load(value):
+        await release.wait()
+        return value
+
+    first = asyncio.ensure_future(flight.do('a', lambda: load('a')))
+    second = asyncio.ensure_future(flight.do('b', lambda: load('b')))
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(first, second) == ['a', 'b']
+    assert flight.stats.executed == 2  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_singleflight_deve_compartilhar_excecao():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def load():
+        await release.wait()
+        raise ValueError('Database unavailable')
+
+    tasks = [asyncio.ensure_future(flight.do('key', load)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_singleflight_deve_repetir_se_primeira_chamada_for_cancelada():
+    flight = SingleFlight()
+    release = asyncio.Event()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await release.wait()
+        return b'page'
+
+    leader = asyncio.ensure_future(flight.do('key', load))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do('key', load))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await follower == b'page'
+    assert leader.cancelled()
+    assert len(calls) == 2  # noqa: PLR2004
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import logging
+
+import pytest
+from sqlalchemy import event, select, update
+
+from fastapi_do_zero.models import User
+from fastapi_do_zero.slow_queries import (
+    SlowQueryLog,
+    is_explainable,
+    normalize_sql,
+    parameters_shape,
+)
+
+
+def test_normalize_sql_deve_remover_literais_e_listas_de_parametros():
+    statement = """
+        SELECT todos.id FROM todos
+        WHERE todos.id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s)
+        AND todos.title LIKE '%x%'
+        LIMIT 10
+    """
+
+    assert normalize_sql(statement) == (
+        'SELECT todos.id FROM todos WHERE todos.id IN (...) '
+        'AND todos.title LIKE ? LIMIT ?'
+    )
+
+
+def test_parameters_shape_nao_deve_registrar_valores():
+    assert parameters_shape({'email': 'alice@test.com', 'id': 1}) == {
+        'email': 'str',
+        'id': 'int',
+    }
+    assert parameters_shape(('alice', None)) == ['str', 'NoneType']
+    assert parameters_shape([{'id': 1}, {'id': 2}], executemany=True) == {
+        'rows': 2,
+        'row': {'id': 'int'},
+    }
+
+
+def test_is_explainable_deve_aceitar_apenas_leituras():
+    assert is_explainable('SELECT * FROM todos')
+    assert not is_explainable('SELECT * FROM todos FOR UPDATE')
+    assert not is_explainable('WITH deleted AS (DELETE FROM todos) SELECT 1')
+    assert not is_explainable('UPDATE todos SET title = %(title)s')
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def slow_query_log(engine):
+    handler = ListHandler()
+    log = SlowQueryLog(threshold_ms=0, handler=handler, explain_rate=1.0)
+    log.instrument(engine)
+    log.start()
+
+    yield log
+
+    event.remove(engine.sync_engine, 'before_cursor_execute', log.before)
+    event.remove(engine.sync_engine, 'after_cursor_execute', log.after)
+
+
+def records(log: SlowQueryLog) -> list[dict]:
+    """
+    Stop the log, writing the queued records, and read them.
+    """
+    log.stop()
+    return [
+        json.loads(record.getMessage())
+        for record in log.listener.handlers[0].records
+    ]
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log_deve_registrar_plano_das_consultas(
+    session, user, slow_query_log
+):
+    await session.scalar(select(User).where(User.id == user.id))
+    await asyncio.gather(*slow_query_log._tasks)
+
+    logged = records(slow_query_log)
+    [record] = [r for r in logged if 'plan' in r]
+    assert record['event'] == 'slow_query'
+    assert record['sql'].startswith('SELECT users.id')
+    assert record['parameters'] == {'id_1': 'int'}
+    assert record['plan'][0]['Plan']['Actual Rows'] == 1
+    assert not any(r['sql'].startswith('EXPLAIN') for r in logged)
+
+
+@pytest.mark.asyncio
+async def test_slow_query_log_nao_deve_explicar_escritas(
+    session, user, slow_query_log
+):
+    await session.execute(
+        update(User).where(User.id == user.id).values(username='bob')
+    )
+    await session.commit()
+    await asyncio.gather(*slow_query_log._tasks)
+
+    [record] = [
+        r for r in records(slow_query_log) if r['sql'].startswith('UPDATE')
+    ]
+    assert 'plan' not in record
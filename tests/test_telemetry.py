@@ -0,0 +1,103 @@
+import json
+import logging
+from http import HTTPStatus
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+
+from fastapi_do_zero.models import User
+from fastapi_do_zero.responses import PydanticResponse
+from fastapi_do_zero.telemetry import (
+    MetricsMiddleware,
+    RequestStats,
+    after_statement,
+    before_statement,
+    request_stats,
+    timed,
+)
+
+
+def make_app(**options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get('/items/{item_id}')
+    async def read_item(item_id: int):
+        with timed('hash'):
+            pass
+        return PydanticResponse({'id': item_id})
+
+    app.add_middleware(MetricsMiddleware, **options)
+    return app
+
+
+def test_server_timing_deve_enviar_fases_da_requisicao():
+    client = TestClient(make_app(server_timing=True))
+
+    response = client.get('/items/1')
+
+    assert response.status_code == HTTPStatus.OK
+    phases = [
+        metric.split(';')[0]
+        for metric in response.headers['Server-Timing'].split(', ')
+    ]
+    assert phases == ['hash', 'serialize', 'app']
+
+
+def test_server_timing_deve_ser_opcional():
+    client = TestClient(make_app())
+
+    response = client.get('/items/1')
+
+    assert 'Server-Timing' not in response.headers
+
+
+def test_requisicao_lenta_deve_ser_registrada(caplog):
+    client = TestClient(make_app(slow_request_ms=0.001))
+
+    with caplog.at_level(logging.WARNING, logger='uvicorn.error'):
+        client.get('/items/1')
+
+    [record] = [r for r in caplog.records if hasattr(r, 'slow_request')]
+    assert record.slow_request['route'] == '/items/{item_id}'
+    assert record.slow_request['path'] == '/items/1'
+    assert record.slow_request['status'] == HTTPStatus.OK
+    assert json.loads(record.getMessage().removeprefix('Slow request: ')) == (
+        record.slow_request
+    )
+
+
+def test_requisicao_rapida_nao_deve_ser_registrada(caplog):
+    client = TestClient(
+        make_app(slow_request_ms=60_000, slow_request_statements=10)
+    )
+
+    with caplog.at_level(logging.WARNING, logger='uvicorn.error'):
+        client.get('/items/1')
+
+    assert not [r for r in caplog.records if hasattr(r, 'slow_request')]
+
+
+@pytest.mark.asyncio
+async def test_eventos_sql_devem_contabilizar_consultas_da_requisicao(
+    session, engine, user
+):
+    event.listen(engine.sync_engine, 'before_cursor_execute', before_statement)
+    event.listen(engine.sync_engine, 'after_cursor_execute', after_statement)
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    try:
+        await session.scalars(select(User))
+    finally:
+        request_stats.reset(token)
+        event.remove(
+            engine.sync_engine, 'before_cursor_execute', before_statement
+        )
+        event.remove(
+            engine.sync_engine, 'after_cursor_execute', after_statement
+        )
+
+    assert stats.statements == 1
+    assert stats.rows == 1
+    assert stats.phases['db'] > 0
@@ -2,8 +2,12 @@ from http import HTTPStatus
 
 import factory.fuzzy
 import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from fastapi_do_zero.models import Todo, TodoState
+from fastapi_do_zero.models import Todo, TodoState, TodoTombstone
+from fastapi_do_zero.pagination import encode_cursor
+from fastapi_do_zero.schemas import BULK_MAX_ITEMS
 
 
 class TodoFactory(factory.Factory):
@@ -269,3 +273,671 @@ def test_list_todos_filter_max_length_exercicio_06(client, token):
     )
 
     assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_requisicao_autenticada_nao_deve_carregar_todos_do_usuario(
+    session, client, user, token, sql_statements
+):
+    session.add_all(TodoFactory.create_batch(50, user_id=user.id))
+    await session.commit()
+    sql_statements.clear()
+
+    response = client.post(
+        '/auth/refresh_token',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(sql_statements) == 1
+    assert 'todos' not in sql_statements[0]
+
+
+def test_requisicao_autenticada_deve_usar_usuario_em_cache(
+    client, user, token, sql_statements
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+    sql_statements.clear()
+
+    response = client.post('/auth/refresh_token', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert sql_statements == []
+
+
+@pytest.mark.asyncio
+async def test_list_todos_deve_executar_apenas_consultas_esperadas(
+    session, client, user, token, sql_statements
+):
+    expected_todos = 10
+    # The user, the list version and the page.
+    expected_statements = 3
+    session.add_all(TodoFactory.create_batch(50, user_id=user.id))
+    await session.commit()
+    sql_statements.clear()
+
+    response = client.get(
+        '/todos/?limit=10',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()['todos']) == expected_todos
+    assert len(sql_statements) == expected_statements
+
+
+@pytest.mark.asyncio
+async def test_list_todos_com_cursor_deve_percorrer_todas_as_paginas(
+    session, client, user, token
+):
+    expected_pages = [2, 2, 1]
+    todos = TodoFactory.create_batch(5, user_id=user.id)
+    session.add_all(todos)
+    await session.commit()
+
+    pages = []
+    received_ids = []
+    params = {'limit': 2}
+    while True:
+        response = client.get(
+            '/todos/',
+            params=params,
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        data = response.json()
+        pages.append(len(data['todos']))
+        received_ids += [todo['id'] for todo in data['todos']]
+
+        if not data['next_cursor']:
+            break
+        params['cursor'] = data['next_cursor']
+
+    assert pages == expected_pages
+    assert received_ids == sorted(todo.id for todo in todos)
+
+
+def test_list_todos_com_offset_e_cursor_deve_retornar_422(client, token):
+    response = client.get(
+        '/todos/?offset=1&cursor=eyJpZCI6MX0',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_list_todos_busca_deve_retornar_resultados_por_relevancia(
+    session, client, user, token
+):
+    session.add_all([
+        TodoFactory(user_id=user.id, title='buy milk', description='market'),
+        TodoFactory(
+            user_id=user.id, title='milk the cow', description='more milk'
+        ),
+        TodoFactory(user_id=user.id, title='walk', description='the dog'),
+    ])
+    await session.commit()
+
+    response = client.get(
+        '/todos/?q=milk',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [todo['title'] for todo in response.json()['todos']] == [
+        'milk the cow',
+        'buy milk',
+    ]
+    assert response.json()['next_cursor'] is None
+
+
+def test_list_todos_busca_com_cursor_deve_retornar_422(client, token):
+    response = client.get(
+        '/todos/?q=milk&cursor=eyJpZCI6MX0',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_patch_todo_deve_usar_um_unico_comando(
+    session, client, user, token, sql_statements
+):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+    sql_statements.clear()
+
+    response = client.patch(
+        f'/todos/{todo.id}',
+        json={'state': 'done'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    todo_statements = [s for s in sql_statements if 'todos' in s]
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['state'] == 'done'
+    assert len(todo_statements) == 1
+    assert todo_statements[0].startswith('UPDATE todos')
+    assert 'RETURNING' in todo_statements[0]
+
+
+def test_patch_todo_de_outro_usuario_deve_retornar_404(
+    client, other_user, token
+):
+    response = client.post(
+        '/auth/token',
+        data={
+            'username': other_user.email,
+            'password': other_user.clean_password,
+        },
+    )
+    other_token = response.json()['access_token']
+    todo_id = client.post(
+        '/todos',
+        headers={'Authorization': f'Bearer {other_token}'},
+        json={'title': 'Test', 'description': 'Test', 'state': 'draft'},
+    ).json()['id']
+
+    response = client.patch(
+        f'/todos/{todo_id}',
+        json={'title': 'teste!'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_create_e_delete_todo_devem_usar_um_unico_comando(
+    client, token, sql_statements
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+    sql_statements.clear()
+
+    todo_id = client.post(
+        '/todos',
+        headers=headers,
+        json={'title': 'Test', 'description': 'Test', 'state': 'draft'},
+    ).json()['id']
+    response = client.delete(f'/todos/{todo_id}', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    # The tombstone is written by the same statement as the delete.
+    assert [s.split()[0] for s in sql_statements] == ['INSERT', 'WITH']
+    assert 'DELETE FROM todos' in sql_statements[1]
+    assert 'INSERT INTO todo_tombstones' in sql_statements[1]
+    assert all('RETURNING' in s for s in sql_statements)
+
+
+def test_bulk_create_todos_deve_inserir_em_um_unico_comando(
+    client, token, sql_statements
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+    sql_statements.clear()
+    todos = [
+        {'title': f'Todo {i}', 'description': 'Bulk', 'state': 'todo'}
+        for i in range(5)
+    ]
+
+    response = client.post('/todos/bulk', headers=headers, json=todos)
+
+    results = response.json()['results']
+    assert response.status_code == HTTPStatus.CREATED
+    assert [r['status'] for r in results] == ['created'] * 5
+    assert [r['todo']['title'] for r in results] == [
+        f'Todo {i}' for i in range(5)
+    ]
+    inserts = [s for s in sql_statements if s.startswith('INSERT')]
+    assert len(inserts) == 1
+
+
+def test_bulk_create_todos_deve_limitar_o_tamanho_da_lista(client, token):
+    todos = [{'title': 'Todo', 'description': 'Bulk', 'state': 'todo'}] * (
+        BULK_MAX_ITEMS + 1
+    )
+
+    response = client.post(
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=todos,
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_bulk_patch_todos_deve_retornar_resultado_por_item(
+    session, client, user, other_user, token
+):
+    todo = TodoFactory(user_id=user.id, state=TodoState.draft)
+    other_todo = TodoFactory(user_id=other_user.id)
+    session.add_all([todo, other_todo])
+    await session.commit()
+
+    response = client.patch(
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[
+            {'id': todo.id, 'state': 'done'},
+            {'id': other_todo.id, 'state': 'done'},
+            {'id': 9999, 'title': 'missing'},
+        ],
+    )
+
+    results = response.json()['results']
+    assert response.status_code == HTTPStatus.OK
+    assert [r['status'] for r in results] == [
+        'updated',
+        'not_found',
+        'not_found',
+    ]
+    assert results[0]['todo']['state'] == 'done'
+    assert results[1]['todo'] is None
+
+
+@pytest.mark.asyncio
+async def test_bulk_patch_todos_sem_campos_deve_retornar_unchanged(
+    session, client, user, token
+):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+
+    response = client.patch(
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[{'id': todo.id}],
+    )
+
+    [result] = response.json()['results']
+    assert response.status_code == HTTPStatus.OK
+    assert result['status'] == 'unchanged'
+    assert result['todo']['title'] == todo.title
+
+
+def test_bulk_patch_todos_com_campo_nulo_deve_retornar_422(client, token):
+    response = client.patch(
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[{'id': 1, 'title': None}],
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_todos_deve_remover_apenas_os_do_usuario(
+    session, client, user, other_user, token
+):
+    todos = TodoFactory.create_batch(3, user_id=user.id)
+    other_todo = TodoFactory(user_id=other_user.id)
+    session.add_all([*todos, other_todo])
+    await session.commit()
+    ids = [todo.id for todo in todos]
+
+    response = client.request(
+        'DELETE',
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[*ids, other_todo.id],
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [r['status'] for r in response.json()['results']] == [
+        'deleted',
+        'deleted',
+        'deleted',
+        'not_found',
+    ]
+    remaining = await session.scalars(select(Todo.id))
+    assert list(remaining) == [other_todo.id]
+
+
+def test_todo_changes_sem_cursor_deve_retornar_todos_os_todos(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    ids = [
+        r['id']
+        for r in client.post(
+            '/todos/bulk',
+            headers=headers,
+            json=[
+                {'title': f'Todo {i}', 'description': 'Sync', 'state': 'todo'}
+                for i in range(3)
+            ],
+        ).json()['results']
+    ]
+
+    response = client.get('/todos/changes', headers=headers)
+
+    data = response.json()
+    assert response.status_code == HTTPStatus.OK
+    assert [todo['id'] for todo in data['todos']] == ids
+    assert data['deleted'] == []
+    assert data['next_cursor']
+    assert data['has_more'] is False
+
+
+@pytest.mark.asyncio
+async def test_todo_changes_deve_retornar_apenas_as_mudancas_e_exclusoes(
+    session, client, user, other_user, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    todos = TodoFactory.create_batch(3, user_id=user.id)
+    session.add_all(todos)
+    await session.commit()
+    cursor = client.get('/todos/changes', headers=headers).json()[
+        'next_cursor'
+    ]
+
+    client.patch(
+        f'/todos/{todos[0].id}', headers=headers, json={'state': 'done'}
+    )
+    client.delete(f'/todos/{todos[1].id}', headers=headers)
+    created = client.post(
+        '/todos',
+        headers=headers,
+        json={'title': 'New', 'description': 'Sync', 'state': 'todo'},
+    ).json()
+    session.add(TodoFactory(user_id=other_user.id))
+    await session.commit()
+
+    response = client.get(
+        '/todos/changes', headers=headers, params={'since': cursor}
+    )
+
+    data = response.json()
+    assert response.status_code == HTTPStatus.OK
+    assert [todo['id'] for todo in data['todos']] == [
+        todos[0].id,
+        created['id'],
+    ]
+    assert data['todos'][0]['state'] == 'done'
+    assert data['deleted'] == [todos[1].id]
+
+    response = client.get(
+        '/todos/changes',
+        headers=headers,
+        params={'since': data['next_cursor']},
+    )
+
+    assert response.json() == {
+        'todos': [],
+        'deleted': [],
+        'next_cursor': data['next_cursor'],
+        'has_more': False,
+    }
+
+
+@pytest.mark.asyncio
+async def test_todo_changes_deve_paginar_com_has_more(
+    session, client, user, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    todos = TodoFactory.create_batch(3, user_id=user.id)
+    session.add_all(todos)
+    await session.commit()
+
+    first = client.get(
+        '/todos/changes', headers=headers, params={'limit': 2}
+    ).json()
+    second = client.get(
+        '/todos/changes',
+        headers=headers,
+        params={'limit': 2, 'since': first['next_cursor']},
+    ).json()
+
+    assert first['has_more'] is True
+    assert second['has_more'] is False
+    assert len(first['todos']) + len(second['todos']) == len(todos)
+
+
+@pytest.mark.asyncio
+async def test_todo_changes_nao_deve_pular_transacao_que_commita_por_ultimo(  # noqa: PLR0913, PLR0917
+    engine, session, client, user, other_user, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    async with (
+        AsyncSession(engine, expire_on_commit=False) as first,
+        AsyncSession(engine, expire_on_commit=False) as second,
+    ):
+        # `first` starts writing before `second`, but commits after it.
+        first.add(TodoFactory(user_id=other_user.id))
+        await first.flush()
+
+        early = TodoFactory(user_id=user.id)
+        second.add(early)
+        await second.commit()
+        # Each request reads in a transaction of its own.
+        await session.commit()
+        before = client.get('/todos/changes', headers=headers).json()
+
+        late = TodoFactory(user_id=user.id)
+        first.add(late)
+        await first.commit()
+
+    cursor = before['next_cursor']
+    await session.commit()
+    after = client.get(
+        '/todos/changes',
+        headers=headers,
+        params={'since': cursor} if cursor else {},
+    ).json()
+
+    synced = [todo['id'] for todo in before['todos'] + after['todos']]
+    assert sorted(synced) == sorted([early.id, late.id])
+
+
+def test_todo_changes_com_cursor_invalido_deve_retornar_422(client, token):
+    response = client.get(
+        '/todos/changes',
+        headers={'Authorization': f'Bearer {token}'},
+        params={'since': encode_cursor({'id': 1})},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_todos_deve_registrar_tombstones(
+    session, client, user, token
+):
+    todos = TodoFactory.create_batch(2, user_id=user.id)
+    session.add_all(todos)
+    await session.commit()
+
+    client.request(
+        'DELETE',
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[todo.id for todo in todos],
+    )
+
+    tombstones = await session.scalars(
+        select(TodoTombstone.todo_id).where(TodoTombstone.user_id == user.id)
+    )
+    assert sorted(tombstones) == sorted(todo.id for todo in todos)
+
+
+@pytest.mark.asyncio
+async def test_todo_stats_deve_acompanhar_as_escritas(
+    session, client, user, other_user, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    session.add(TodoFactory(user_id=other_user.id, state=TodoState.done))
+    await session.commit()
+    ids = [
+        r['id']
+        for r in client.post(
+            '/todos/bulk',
+            headers=headers,
+            json=[
+                {'title': f'Todo {i}', 'description': 'Stats', 'state': 'todo'}
+                for i in range(4)
+            ],
+        ).json()['results']
+    ]
+    client.post(
+        '/todos/import',
+        headers=headers,
+        content=b'{"title": "Um", "description": "Import", "state": "doing"}',
+    )
+    client.patch(f'/todos/{ids[0]}', headers=headers, json={'state': 'done'})
+    client.patch(f'/todos/{ids[1]}', headers=headers, json={'title': 'Novo'})
+    client.delete(f'/todos/{ids[2]}', headers=headers)
+
+    response = client.get('/todos/stats', headers=headers)
+
+    data = response.json()
+    assert response.status_code == HTTPStatus.OK
+    assert data['total'] == len(ids)
+    assert data['states'] == {
+        'draft': 0,
+        'todo': 2,
+        'doing': 1,
+        'done': 1,
+        'trash': 0,
+    }
+    assert [day['created'] for day in data['created_per_day']] == [5]
+
+
+def test_todo_stats_nao_deve_ler_a_tabela_de_todos(
+    client, token, sql_statements
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+    sql_statements.clear()
+
+    response = client.get('/todos/stats', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert not any('FROM todos ' in s for s in sql_statements)
+
+
+def test_list_todos_deve_retornar_304_enquanto_a_lista_nao_mudar(
+    client, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    todo = client.post(
+        '/todos',
+        headers=headers,
+        json={'title': 'Test', 'description': 'Test', 'state': 'draft'},
+    ).json()
+    first = client.get('/todos', headers=headers)
+    etag = first.headers['etag']
+
+    cached = client.get('/todos', headers={**headers, 'If-None-Match': etag})
+    client.delete(f'/todos/{todo["id"]}', headers=headers)
+    changed = client.get('/todos', headers={**headers, 'If-None-Match': etag})
+
+    assert etag.startswith('W/')
+    assert cached.status_code == HTTPStatus.NOT_MODIFIED
+    assert not cached.content
+    assert 'last-modified' not in first.headers
+    assert changed.status_code == HTTPStatus.OK
+    assert changed.headers['etag'] != etag
+
+
+def test_list_todos_deve_mudar_o_etag_a_cada_escrita_no_mesmo_segundo(
+    client, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    todo_id = client.post(
+        '/todos',
+        headers=headers,
+        json={'title': 'Test', 'description': 'Test', 'state': 'draft'},
+    ).json()['id']
+
+    etags = []
+    for state in ('todo', 'doing', 'done'):
+        client.patch(
+            f'/todos/{todo_id}', headers=headers, json={'state': state}
+        )
+        etags.append(client.get('/todos', headers=headers).headers['etag'])
+
+    assert len(set(etags)) == len(etags)
+
+
+def test_list_todos_deve_variar_o_etag_com_os_filtros(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    draft = client.get('/todos?state=draft', headers=headers)
+    done = client.get('/todos?state=done', headers=headers)
+
+    assert draft.headers['etag'] != done.headers['etag']
+
+
+@pytest.mark.asyncio
+async def test_read_todo_deve_retornar_etag_e_304(
+    session, client, user, token
+):
+    todo = TodoFactory(user_id=user.id)
+    session.add(todo)
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.get(f'/todos/{todo.id}', headers=headers)
+    cached = client.get(
+        f'/todos/{todo.id}',
+        headers={**headers, 'If-None-Match': response.headers['etag']},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['title'] == todo.title
+    assert cached.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_read_todo_inexistente_deve_retornar_404(client, token):
+    response = client.get(
+        '/todos/999', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_patch_todo_com_if_match_deve_aplicar_controle_otimista(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    todo_id = client.post(
+        '/todos',
+        headers=headers,
+        json={'title': 'Test', 'description': 'Test', 'state': 'draft'},
+    ).json()['id']
+    etag = client.get(f'/todos/{todo_id}', headers=headers).headers['etag']
+
+    first = client.patch(
+        f'/todos/{todo_id}',
+        headers={**headers, 'If-Match': etag},
+        json={'state': 'doing'},
+    )
+    stale = client.patch(
+        f'/todos/{todo_id}',
+        headers={**headers, 'If-Match': etag},
+        json={'state': 'done'},
+    )
+    fresh = client.patch(
+        f'/todos/{todo_id}',
+        headers={**headers, 'If-Match': first.headers['etag']},
+        json={'state': 'done'},
+    )
+
+    assert first.status_code == HTTPStatus.OK
+    assert stale.status_code == HTTPStatus.PRECONDITION_FAILED
+    assert stale.json() == {'detail': 'Todo has been modified'}
+    assert fresh.status_code == HTTPStatus.OK
+    assert fresh.json()['state'] == 'done'
+    assert etag == f'"{todo_id}-1"'
+    assert fresh.headers['etag'] == f'"{todo_id}-3"'
+
+
+def test_patch_todo_inexistente_com_if_match_deve_retornar_404(client, token):
+    response = client.patch(
+        '/todos/999',
+        headers={'Authorization': f'Bearer {token}', 'If-Match': '"999-1"'},
+        json={'state': 'done'},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -1,5 +1,12 @@
 from http import HTTPStatus
 
+import pytest
+from sqlalchemy import func, select
+
+from fastapi_do_zero.cache import SharedCache
+from fastapi_do_zero.models import Todo, TodoState, User
+from fastapi_do_zero.routers import users
+from fastapi_do_zero.routers.users import purge_user
 from fastapi_do_zero.schemas import UserPublicSchema
 from fastapi_do_zero.security import create_access_token
 
@@ -58,7 +65,7 @@ def test_read_users_deve_retornar_lista_de_usuarios(client, user, token):
     )
 
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': [user_schema]}
+    assert response.json() == {'users': [user_schema], 'next_cursor': None}
 
 
 def test_read_user_deve_retornar_usuario_existente(client, user):
@@ -79,6 +86,35 @@ def test_read_user_deve_retornar_404_para_usuario_inexistente(client):
     assert response.json() == {'detail': 'User not found'}
 
 
+def test_read_users_com_cursor_deve_paginar_por_id(
+    client, user, other_user, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first_page = client.get('/users/?limit=1', headers=headers).json()
+    second_page = client.get(
+        f'/users/?limit=1&cursor={first_page["next_cursor"]}',
+        headers=headers,
+    ).json()
+    last_page = client.get(
+        f'/users/?limit=1&cursor={second_page["next_cursor"]}',
+        headers=headers,
+    ).json()
+
+    assert first_page['users'][0]['id'] == user.id
+    assert second_page['users'][0]['id'] == other_user.id
+    assert last_page == {'users': [], 'next_cursor': None}
+
+
+def test_read_users_com_cursor_invalido_deve_retornar_422(client, token):
+    response = client.get(
+        '/users/?cursor=invalid',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
 # Update
 def test_update_user_deve_atualizar_usuario_existente(client, user, token):
     response = client.put(
@@ -170,3 +206,153 @@ def test_get_current_user_nao_encontrado_deve_retornar_403(client):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+@pytest.mark.asyncio
+async def test_delete_user_deve_remover_todos_do_usuario(
+    session, client, user, token, sql_statements
+):
+    session.add(
+        Todo(
+            title='Test todo',
+            description='Test todo description',
+            state=TodoState.draft,
+            user_id=user.id,
+        )
+    )
+    await session.commit()
+
+    sql_statements.clear()
+
+    response = client.delete(
+        f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert not any('todos' in statement for statement in sql_statements)
+    assert await session.scalar(select(func.count()).select_from(Todo)) == 0
+
+
+@pytest.mark.asyncio
+async def test_delete_user_em_background_deve_retornar_202_e_remover_dados(
+    session, client, user, token
+):
+    session.add_all([
+        Todo(
+            title=f'Test todo {n}',
+            description='Test todo description',
+            state=TodoState.draft,
+            user_id=user.id,
+        )
+        for n in range(5)
+    ])
+    await session.commit()
+
+    response = client.delete(
+        f'/users/{user.id}?background=true',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert response.json() == {'message': 'User deletion scheduled'}
+    assert await session.scalar(select(func.count()).select_from(Todo)) == 0
+    assert await session.scalar(select(func.count()).select_from(User)) == 0
+
+
+@pytest.mark.asyncio
+async def test_purge_user_deve_remover_todos_em_lotes(
+    session, engine, monkeypatch, user, sql_statements
+):
+    monkeypatch.setattr(users, 'engine', engine)
+    expected_deletes = 4
+    session.add_all([
+        Todo(
+            title=f'Test todo {n}',
+            description='Test todo description',
+            state=TodoState.draft,
+            user_id=user.id,
+        )
+        for n in range(5)
+    ])
+    await session.commit()
+    sql_statements.clear()
+
+    await purge_user(user.id, user.email, batch_size=2)
+
+    assert engine.pool.checkedout() == 0
+    deletes = [s for s in sql_statements if s.startswith('DELETE')]
+    assert len(deletes) == expected_deletes
+    assert await session.scalar(select(func.count()).select_from(User)) == 0
+
+
+def test_read_user_deve_usar_o_cache(client, user, sql_statements):
+    client.get(f'/users/{user.id}')
+    sql_statements.clear()
+
+    response = client.get(f'/users/{user.id}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['username'] == user.username
+    assert sql_statements == []
+
+
+def test_read_user_com_if_none_match_deve_retornar_304(client, user):
+    etag = client.get(f'/users/{user.id}').headers['etag']
+
+    response = client.get(
+        f'/users/{user.id}', headers={'If-None-Match': f'W/"x", {etag}'}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['etag'] == etag
+    assert not response.content
+
+
+def test_update_user_deve_invalidar_o_cache(client, user, token):
+    etag = client.get(f'/users/{user.id}').headers['etag']
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': 'novo',
+            'email': user.email,
+            'password': user.clean_password,
+        },
+    )
+
+    response = client.get(f'/users/{user.id}', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['username'] == 'novo'
+    assert response.headers['etag'] != etag
+
+
+def test_cache_compartilhado_deve_invalidar_em_todos_os_workers(
+    client, user, token, fake_redis, monkeypatch
+):
+    worker = SharedCache(fake_redis, ttl=60, prefix='users:')
+    other_worker = SharedCache(fake_redis, ttl=60, prefix='users:')
+    monkeypatch.setattr(users, 'user_cache', worker)
+    client.get(f'/users/{user.id}')
+
+    monkeypatch.setattr(users, 'user_cache', other_worker)
+    client.delete(
+        f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    monkeypatch.setattr(users, 'user_cache', worker)
+    response = client.get(f'/users/{user.id}')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_cache_compartilhado_indisponivel_deve_ler_do_banco(
+    client, user, fake_redis, monkeypatch
+):
+    fake_redis.available = False
+    monkeypatch.setattr(users, 'user_cache', SharedCache(fake_redis, ttl=60))
+
+    response = client.get(f'/users/{user.id}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['id'] == user.id